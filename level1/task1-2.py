@@ -1,54 +1,27 @@
+import os
 import re
+import sys
 from termcolor import colored
-import spacy
 
-nlp = spacy.load('en_core_web_sm')
+# Parsing and search run in the shared query daemon (level4/web_kwic_app/kwic_daemon.py),
+# which is started on first use and keeps the model and parsed text loaded between runs
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'level4', 'web_kwic_app'))
+from kwic_client import KwicClient
 
 def kwic(text, target, window=5, search_type='token', color='cyan', attrs=None):
     if attrs is None:
         attrs = ['bold']
 
-    doc = nlp(text)
-    tokens = [tok.text for tok in doc]
-    matches = []
-
-    if search_type == 'token':
-        target_words = target.split()
-        n = len(target_words)
-        lowered = [t.lower() for t in tokens]
-        for i in range(len(tokens) - n + 1):
-            if lowered[i:i+n] == [w.lower() for w in target_words]:
-                matches.append((i, n))
-
-    elif search_type == 'pos':
-        target_tags = target.split()
-        n = len(target_tags)
-        pos_list = [tok.pos_ for tok in doc]
-        for i in range(len(pos_list) - n + 1):
-            if pos_list[i:i+n] == target_tags:
-                matches.append((i, n))
-
-    elif search_type == 'entity':
-        ent_type = target.upper()
-        for ent in doc.ents:
-            if ent.label_ == ent_type and ent.text != "NLP":  # filter out 'NLP'
-                matches.append((ent.start, ent.end - ent.start))
-
-    else:
+    if search_type not in {'token', 'pos', 'entity'}:
         raise ValueError("search_type must be one of: 'token', 'pos', 'entity'")
 
-    for idx, length in matches:
-        for sent in doc.sents:
-            if sent.start <= idx < sent.end:
-                sent_tokens = [tok.text_with_ws for tok in sent]
-                local_idx = idx - sent.start
-                left = sent_tokens[max(0, local_idx - window): local_idx]
-                mid = sent_tokens[local_idx: local_idx + length]
-                right = sent_tokens[local_idx + length: local_idx + length + window]
-                mid_str = ''.join(mid).strip()
-                highlighted = colored(mid_str, color, attrs=attrs)
-                print(''.join(left).strip() + ' ' + highlighted + ' ' + ''.join(right).strip())
-                break
+    with KwicClient() as client:
+        result = client.kwic(text=text, search_type=search_type, target=target, window=window,
+                             exclude=['NLP'] if search_type == 'entity' else [])  # filter out 'NLP'
+
+    for row in result['rows']:
+        highlighted = colored(row['mid'], color, attrs=attrs)
+        print(row['left'] + ' ' + highlighted + ' ' + row['right'])
 
 if __name__ == '__main__':
     text = """
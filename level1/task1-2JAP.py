@@ -1,65 +1,27 @@
+import os
 import re
+import sys
 from termcolor import colored
-import spacy
-from spacy.cli import download as spacy_download
 
-def load_spacy_model(name: str):
-    try:
-        return spacy.load(name)
-    except OSError:
-        print(f"モデル '{name}' が見つかりません。ダウンロード中…")
-        spacy_download(name)
-        print(f"モデル '{name}' ダウンロード完了。")
-        return spacy.load(name)
-
-nlp = load_spacy_model('en_core_web_sm')
+# 解析と検索は共有クエリデーモン (level4/web_kwic_app/kwic_daemon.py) が行う。
+# 初回に自動起動し、モデルと解析済みテキストを実行間で保持する（モデルが無ければデーモンがダウンロード）
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'level4', 'web_kwic_app'))
+from kwic_client import KwicClient
 
 def kwic(text, target, window=5, search_type='token', color='cyan', attrs=None):
     if attrs is None:
         attrs = ['bold']
 
-    doc = nlp(text)
-    tokens = [tok.text for tok in doc]
-    matches = []
-
-    if search_type == 'token':
-        target_words = target.split()
-        n = len(target_words)
-        lowered = [t.lower() for t in tokens]
-        for i in range(len(tokens) - n + 1):
-            if lowered[i:i+n] == [w.lower() for w in target_words]:
-                matches.append((i, n))
-
-    elif search_type == 'pos':
-        target_tags = target.split()
-        n = len(target_tags)
-        pos_list = [tok.pos_ for tok in doc]
-        for i in range(len(pos_list) - n + 1):
-            if pos_list[i:i+n] == target_tags:
-                matches.append((i, n))
-
-    elif search_type == 'entity':
-        ent_type = target.upper()
-        for ent in doc.ents:
-            if ent.label_ == ent_type:
-                matches.append((ent.start, ent.end - ent.start))
-
-    else:
+    if search_type not in {'token', 'pos', 'entity'}:
         raise ValueError("search_type は 'token','pos','entity' のいずれかを指定してください。")
 
-    for idx, length in matches:
-        # 所属する文を特定
-        for sent in doc.sents:
-            if sent.start <= idx < sent.end:
-                sent_tokens = [tok.text for tok in sent]
-                local_idx = idx - sent.start
-                left = sent_tokens[max(0, local_idx - window): local_idx]
-                mid = sent_tokens[local_idx: local_idx + length]
-                right = sent_tokens[local_idx + length: local_idx + length + window]
-                mid_str = ' '.join(mid)
-                highlighted = colored(mid_str, color, attrs=attrs)
-                print(' '.join(left) + ' ' + highlighted + ' ' + ' '.join(right))
-                break
+    with KwicClient() as client:
+        result = client.kwic(text=text, search_type=search_type, target=target, window=window,
+                             joiner='space')
+
+    for row in result['rows']:
+        highlighted = colored(row['mid'], color, attrs=attrs)
+        print(row['left'] + ' ' + highlighted + ' ' + row['right'])
 
 if __name__ == '__main__':
     text = """
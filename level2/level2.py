@@ -1,75 +1,31 @@
+import os
 import re
+import sys
 from termcolor import colored
-import spacy
-from collections import Counter
 
-nlp = spacy.load('en_core_web_sm')
+# Parsing, search and sorting run in the shared query daemon (level4/web_kwic_app/kwic_daemon.py),
+# which is started on first use and keeps the model and parsed text loaded between runs
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'level4', 'web_kwic_app'))
+from kwic_client import KwicClient
 
 def kwic(text, target, window=5, search_type='token', color='cyan', attrs=None, sort_mode='sequential'):
     if attrs is None:
         attrs = ['bold']
 
-    doc = nlp(text)
-    tokens = [tok.text for tok in doc]
-    matches = []
-    output_data = []
-
-    if search_type == 'token':
-        target_words = target.split()
-        n = len(target_words)
-        lowered = [t.lower() for t in tokens]
-        for i in range(len(tokens) - n + 1):
-            if lowered[i:i+n] == [w.lower() for w in target_words]:
-                matches.append((i, n))
-
-    elif search_type == 'pos':
-        target_tags = target.split()
-        n = len(target_tags)
-        pos_list = [tok.pos_ for tok in doc]
-        for i in range(len(pos_list) - n + 1):
-            if pos_list[i:i+n] == target_tags:
-                matches.append((i, n))
-
-    elif search_type == 'entity':
-        ent_type = target.upper()
-        for ent in doc.ents:
-            if ent.label_ == ent_type and ent.text != "NLP":
-                matches.append((ent.start, ent.end - ent.start))
-
-    else:
+    if search_type not in {'token', 'pos', 'entity'}:
         raise ValueError("search_type must be one of: 'token', 'pos', 'entity'")
 
-    for idx, length in matches:
-        for sent in doc.sents:
-            if sent.start <= idx < sent.end:
-                sent_tokens = [tok.text_with_ws for tok in sent]
-                sent_doc = list(sent)
-                local_idx = idx - sent.start
-                left = sent_tokens[max(0, local_idx - window): local_idx]
-                mid = sent_tokens[local_idx: local_idx + length]
-                right = sent_tokens[local_idx + length: local_idx + length + window]
-                mid_str = ''.join(mid).strip()
-                highlighted = colored(mid_str, color, attrs=attrs)
-                display = ''.join(left).strip() + ' ' + highlighted + ' ' + ''.join(right).strip()
-                next_token = sent_doc[local_idx + length].text if local_idx + length < len(sent_doc) else ''
-                next_pos = sent_doc[local_idx + length].pos_ if local_idx + length < len(sent_doc) else ''
-                output_data.append((display, next_token, next_pos))
-                break
-
-    if sort_mode == 'sequential':
-        sorted_output = output_data
-    elif sort_mode == 'token_freq':
-        freq = Counter([item[1] for item in output_data])
-        sorted_output = sorted(output_data, key=lambda x: (-freq[x[1]], x[1]))
-    elif sort_mode == 'pos_freq':
-        freq = Counter([item[2] for item in output_data])
-        sorted_output = sorted(output_data, key=lambda x: (-freq[x[2]], x[2]))
-    else:
+    if sort_mode not in {'sequential', 'token_freq', 'pos_freq'}:
         print("Invalid sort_mode. Defaulting to sequential.")
-        sorted_output = output_data
+        sort_mode = 'sequential'
+
+    with KwicClient() as client:
+        result = client.kwic(text=text, search_type=search_type, target=target, window=window,
+                             sort_mode=sort_mode, exclude=['NLP'] if search_type == 'entity' else [])
 
-    for display, _, _ in sorted_output:
-        print(display)
+    for row in result['rows']:
+        highlighted = colored(row['mid'], color, attrs=attrs)
+        print(row['left'] + ' ' + highlighted + ' ' + row['right'])
 
 if __name__ == '__main__':
     text = """
@@ -15,17 +15,74 @@ Algorithm overview:
   - Supports token/lemma/POS/entity search and KWIC extraction with context window.
   - Provides sorting by sequential order, next-token frequency, or next-POS frequency.
   - Displays most frequent next-token patterns.
+  - Parsed corpora are kept as positional indexes (see corpus_index.py) and
+    cached by content hash, so frequency lists and dispersion statistics are
+    served from the index without re-parsing or rescanning tokens.
+
+Concurrency:
+  - A spaCy pipeline is not safe to call from several threads (tokenizing
+    adds to its string store), so every call into the app's pipeline holds
+    kwic_cli's pipeline lock. That pipeline only splits query targets, one
+    short call each. Corpora are parsed in worker processes with pipelines
+    of their own (kwic_cli.parse_pool, KWIC_PARSE_WORKERS of them), so
+    searches on cached corpora never wait for a parse; a build lock per
+    corpus id makes concurrent first requests for one corpus parse it once.
+  - The in-memory LRU cache is guarded by _cache_lock. Indexes are read-only
+    once built (their lazy frequency tables have their own lock).
+  - With KWIC_CACHE_DIR set, built indexes are also written there, so
+    process workers (e.g. gunicorn -w N) can serve each other's corpus ids.
+    The indexes are pickles, so the directory must be private to the
+    server's user (checked at start-up).
+  - `python app.py --serve` runs a waitress thread pool instead of the
+    Flask debug server; loadtest.py measures either.
+  - With KWIC_SOCKET set, the app loads no model and holds no corpus:
+    corpora are parsed and kept by the shared kwic_daemon.py (one model and
+    one in-memory copy per corpus for all workers and CLI tools), and every
+    search, row page and statistics request is answered by the daemon.
+
+Result page:
+  - The page is streamed: header, form, patterns and dispersion go out
+    first, then the first STREAM_ROWS KWIC rows in chunks. Larger results are
+    shown in a virtualized table that fetches further rows from /rows on
+    scroll, so neither side handles every hit at once.
+  - Only the matches are cached per query; context strings are built for
+    the rows actually sent. In document order nothing but the pattern count
+    and dispersion (both from positions) runs per hit before the first byte;
+    the frequency sorts add one key per hit, made of token ids.
 """
 
-from flask import Flask, render_template, request
-import spacy
-from collections import Counter
+from flask import Flask, Response, abort, jsonify, request, stream_with_context, url_for
+from markupsafe import Markup
+from werkzeug.exceptions import HTTPException
+from collections import OrderedDict
+import argparse
 import os
+import threading
+
+from corpus_index import CorpusIndex, LAYERS, MAX_NGRAM, corpus_key
+import kwic_cli
+from kwic_search import QUERY_FIELDS, kwic_result, kwic_rows, search
 
 app = Flask(__name__)
-nlp = spacy.load("en_core_web_sm")
 
-IGNORED_TOKENS = {"(", ")", ",", ".", ":", ";"}
+MODEL         = "en_core_web_sm"
+DAEMON_SOCKET = os.environ.get("KWIC_SOCKET")   # corpora and queries go to kwic_daemon.py instead
+if DAEMON_SOCKET:
+    from kwic_client import KwicClient, KwicError
+else:
+    kwic_cli.get_nlp(MODEL)     # load the model at start-up; it splits query targets
+
+CORPUS_CACHE_SIZE = 4
+CORPUS_CACHE_DIR  = os.environ.get("KWIC_CACHE_DIR")   # optional on-disk cache shared by workers
+PARSE_WORKERS     = int(os.environ.get("KWIC_PARSE_WORKERS", kwic_cli.PARSE_WORKERS))
+_corpus_cache = OrderedDict()   # corpus_id -> CorpusIndex, least recently used first
+_cache_lock   = threading.Lock()
+_build_locks  = {}              # corpus_id -> Lock held while that corpus is parsed
+_parse_pool   = None            # kwic_cli.parse_pool(), started by the first parse
+
+STREAM_ROWS    = 200    # rows rendered into the streamed page (= one client page)
+ROWS_PAGE_MAX  = 1000   # largest slice served by /rows
+STREAM_CHUNK   = 16384  # bytes buffered before each streamed write
 
 POS_TAGS = [
     "ADJ", "ADP", "ADV", "AUX", "CCONJ", "DET", "INTJ", "NOUN", "NUM", "PART",
@@ -37,6 +94,149 @@ ENT_LABELS = [
     "ORDINAL", "CARDINAL"
 ]
 
+# --------------------------------------------------------------------------- #
+# Corpus cache and query helpers                                              #
+# --------------------------------------------------------------------------- #
+def _check_cache_dir(path):
+    """
+    Create the on-disk cache directory (mode 0700) and refuse one that is not
+    private: cached indexes are unpickled, so anyone able to write there
+    could run code in every worker.
+    """
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    st = os.stat(path)
+    if st.st_uid != os.getuid() or st.st_mode & 0o022:
+        raise SystemExit(f"KWIC_CACHE_DIR {path} must be owned by this user and not writable by others")
+
+
+if CORPUS_CACHE_DIR:
+    _check_cache_dir(CORPUS_CACHE_DIR)
+
+
+def _cache_path(corpus_id):
+    return os.path.join(CORPUS_CACHE_DIR, corpus_id + ".idx") if CORPUS_CACHE_DIR else None
+
+
+def _remember(corpus_id, index):
+    with _cache_lock:
+        _corpus_cache[corpus_id] = index
+        _corpus_cache.move_to_end(corpus_id)
+        while len(_corpus_cache) > CORPUS_CACHE_SIZE:
+            _corpus_cache.popitem(last=False)
+
+
+def lookup_corpus(corpus_id):
+    """Return the cached CorpusIndex for `corpus_id` (memory, then disk) or None."""
+    with _cache_lock:
+        index = _corpus_cache.get(corpus_id)
+        if index is not None:
+            _corpus_cache.move_to_end(corpus_id)
+            return index
+
+    path = _cache_path(corpus_id)
+    if path and os.path.exists(path):
+        index = CorpusIndex.load(path)
+        _remember(corpus_id, index)
+        return index
+    return None
+
+
+def load_corpus(text):
+    """
+    Return (corpus_id, CorpusIndex) for `text`, parsing it only on a cache miss.
+
+    The id is a content hash, so identical corpora submitted again (or queried
+    through the statistics endpoints) reuse the same index. With KWIC_SOCKET
+    set the index stays in the daemon and (corpus_id, None) is returned.
+    """
+    if DAEMON_SOCKET:
+        return _daemon("load", text=text)["corpus_id"], None
+
+    corpus_id = corpus_key(text)
+    index = lookup_corpus(corpus_id)
+    if index is None:
+        with _cache_lock:
+            build_lock = _build_locks.setdefault(corpus_id, threading.Lock())
+        with build_lock:
+            # Another request may have built it while we waited for the lock
+            index = lookup_corpus(corpus_id)
+            if index is None:
+                index = _parser().submit(kwic_cli.parse_texts, [text], MODEL).result()
+                path  = _cache_path(corpus_id)
+                if path:
+                    tmp = f"{path}.{os.getpid()}.tmp"
+                    index.save(tmp)
+                    os.replace(tmp, path)
+                _remember(corpus_id, index)
+        with _cache_lock:
+            _build_locks.pop(corpus_id, None)
+    return corpus_id, index
+
+
+def _parser():
+    global _parse_pool
+    with _cache_lock:
+        if _parse_pool is None:
+            _parse_pool = kwic_cli.parse_pool(MODEL, PARSE_WORKERS)
+        return _parse_pool
+
+
+def tokenize(text):
+    """(text, lemma) pairs of a query target."""
+    return kwic_cli.tokenize(text, MODEL)
+
+
+def _daemon(op, **params):
+    """One request to kwic_daemon.py; a corpus id the daemon does not know becomes a 404."""
+    with KwicClient(DAEMON_SOCKET) as client:
+        try:
+            return client.request(op, **params)
+        except KwicError as e:
+            if e.kind == "UnknownCorpusError":
+                abort(404, description="Unknown corpus id; run a search on the corpus first.")
+            raise
+
+
+def query_page(corpus_id, index, params, offset, limit):
+    """
+    One page of a query's results: (total, rows, patterns, dispersion, hits).
+
+    The query (see kwic_search.build_kwic) runs on the local index, or in the
+    daemon when KWIC_SOCKET is set; either way it is cached per corpus and
+    query, and rows are only built for [offset, offset + limit).
+    """
+    if DAEMON_SOCKET:
+        query = {f: params[f] for f in QUERY_FIELDS if f in params}
+        resp  = _daemon("search", corpus_id=corpus_id, offset=offset, limit=limit, **query)
+        rows  = [dict(r, mid_html=Markup(r["mid_html"]) if r["mid_html"] else None) for r in resp["rows"]]
+        patterns = [(tuple(p), c) for p, c in resp["patterns"]]
+        return resp["total"], rows, patterns, resp["dispersion"], resp["hits"]
+
+    matches, patterns, dispersion, hits = kwic_result(corpus_id, index, params, tokenize)
+    return len(matches), kwic_rows(index, matches[offset:offset + limit], params), patterns, dispersion, hits
+
+
+def _chunked(pieces, size=STREAM_CHUNK):
+    """Group the many small strings yielded by Jinja into writes of about `size` bytes."""
+    buf, n = [], 0
+    for piece in pieces:
+        buf.append(piece)
+        n += len(piece)
+        if n >= size:
+            yield "".join(buf)
+            buf, n = [], 0
+    if buf:
+        yield "".join(buf)
+
+
+def stream_page(template_name, **context):
+    """Like render_template(), but sends the page while it is being rendered."""
+    app.update_template_context(context)
+    template = app.jinja_env.get_template(template_name)
+    return Response(stream_with_context(_chunked(template.generate(**context))),
+                    mimetype="text/html")
+
+
 # --------------------------------------------------------------------------- #
 # Main view – handles both GET (initial) and POST (search) requests           #
 # --------------------------------------------------------------------------- #
@@ -48,18 +248,27 @@ def index():
     Algorithm:
       - Accepts corpus input (via textarea or .txt file upload).
       - Accepts search parameters: target string, search type, context window size, sort mode.
-      - Processes text with spaCy NLP pipeline.
-      - Searches for matches based on search type:
+      - Processes text with spaCy NLP pipeline (once per corpus; cached as a positional index).
+      - Searches the index for matches based on search type:
           * Token: exact token match (case-insensitive)
           * Lemma: exact lemma match (case-insensitive)
           * POS: matches POS tag
           * Entity: matches NER label
-      - For each match, extracts left/right context (window), keyword, and next-token info.
+          * Dep: dependency relation (e.g. "dobj make/VERB"), highlighting
+            both the dependent and its head
+      - Optionally keeps only matches within N tokens of a second term
+        (token / lemma / POS / entity), in a given order and sentence.
+      - Optionally builds only a reproducible random sample of N hits
+        (seeded), with the hit count taken from the index.
       - Counts next-token patterns for pattern statistics.
+      - Computes dispersion statistics (range, Juilland's D, DP) for the hits.
       - Sorts results based on user-selected mode.
-      - Returns results and pattern statistics to HTML template.
+      - Streams the page: statistics first, then the first STREAM_ROWS rows
+        (left/right context and keyword extracted for those matches only);
+        the browser fetches the rest from /rows as the table is scrolled.
     """
-    result, patterns = [], []
+    result, patterns, total = [], [], 0
+    corpus_id, dispersion, rows_url, hits = None, None, None, None
 
     if request.method == "POST":
         # --- 1. Corpus text input (from textarea or file upload) --- #
@@ -78,108 +287,142 @@ def index():
                 if not text:
                     text = "Error: Unable to decode file. Use UTF-8 or Shift_JIS."
 
-        # --- 2. Read search parameters from form --- #
-        target   = request.form.get("target", "").strip()
-        s_type   = request.form.get("search_type", "token")   # token / lemma / pos / entity
-        window   = int(request.form.get("window", 5))
-        s_mode   = request.form.get("sort_mode", "sequential")
-
-        # --- 3. NLP processing using spaCy --- #
-        doc = nlp(text.replace("\n", " "))
-        matches = []  # list of (match_start_index, match_span_length)
-
-        # --- 3-A. Token (exact match) search --- #
-        if s_type == "token":
-            tgt_doc   = nlp(target)
-            tgt_txts  = [t.text.lower() for t in tgt_doc]
-            span_len  = len(tgt_txts)
-
-            for i in range(len(doc) - span_len + 1):
-                ok = True
-                for j in range(span_len):
-                    if doc[i + j].text.lower() != tgt_txts[j]:
-                        ok = False
-                        break
-                if ok and doc[i].text not in IGNORED_TOKENS:
-                    matches.append((i, span_len))
-
-        # --- 3-B. Lemma search (match on lemmatized form) --- #
-        elif s_type == "lemma":
-            tgt_doc   = nlp(target)
-            tgt_lems  = [t.lemma_.lower() for t in tgt_doc]
-            span_len  = len(tgt_lems)
-
-            for i in range(len(doc) - span_len + 1):
-                ok = True
-                for j in range(span_len):
-                    if doc[i + j].lemma_.lower() != tgt_lems[j]:
-                        ok = False
-                        break
-                if ok and doc[i].text not in IGNORED_TOKENS:
-                    matches.append((i, span_len))
-
-        # --- 3-C. POS tag search (exact POS match) --- #
-        elif s_type == "pos":
-            for i, tok in enumerate(doc):
-                if tok.pos_ == target and tok.text not in IGNORED_TOKENS:
-                    matches.append((i, 1))
-
-        # --- 3-D. Entity label (NER) search --- #
-        elif s_type == "entity":
-            for ent in doc.ents:
-                if ent.label_ == target.upper() and doc[ent.start].text not in IGNORED_TOKENS:
-                    matches.append((ent.start, ent.end - ent.start))
-
-        # --- 4. Build KWIC lines and count next-token patterns --- #
-        pattern_counter, output = Counter(), []
-        for idx, span_len in matches:
-            # Find the sentence containing the matched token(s)
-            sent = next(s for s in doc.sents if s.start <= idx < s.end)
-            loc  = idx - sent.start
-            toks = [t.text for t in sent]
-
-            # Extract context windows
-            left  = toks[max(0, loc - window): loc]
-            mid   = toks[loc: loc + span_len]
-            right = toks[loc + span_len: loc + span_len + window]
-
-            # Gather next-token information for pattern statistics
-            next_tok = sent[loc + span_len] if (loc + span_len) < len(sent) else None
-            if next_tok:
-                pattern_counter[(next_tok.text, next_tok.pos_, next_tok.ent_type_ or "")] += 1
-
-            # Append KWIC row
-            output.append({
-                "left":  " ".join(left),
-                "mid":   " ".join(mid),
-                "right": " ".join(right),
-                "next_word": next_tok.text.lower() if next_tok else "",
-                "next_pos":  next_tok.pos_       if next_tok else ""
-            })
-
-        # --- 5. Sort results as specified --- #
-        if s_mode == "token_freq":
-            # Sort by most frequent next-token (descending)
-            freq = Counter(o["next_word"] for o in output if o["next_word"])
-            output.sort(key=lambda x: (-freq.get(x["next_word"], 0), x["left"], x["right"]))
-        elif s_mode == "pos_freq":
-            # Sort by most frequent next-POS (descending)
-            pfreq = Counter(o["next_pos"] for o in output if o["next_pos"])
-            output.sort(key=lambda x: (-pfreq.get(x["next_pos"], 0), x["left"], x["right"]))
-
-        result   = output
-        patterns = pattern_counter.most_common(10)
-
-    # --- 6. Render template with results and statistics --- #
-    return render_template(
+        # --- 2. NLP processing (cached positional index) --- #
+        corpus_id, index = load_corpus(text)
+
+        # --- 3. First rows, next-token patterns and dispersion (cached per query) --- #
+        total, result, patterns, dispersion, hits = query_page(corpus_id, index, request.form, 0, STREAM_ROWS)
+        query    = {f: request.form[f] for f in QUERY_FIELDS if f in request.form}
+        rows_url = url_for("rows_view", corpus_id=corpus_id, **query)
+
+    # --- 4. Stream template with statistics first, then the first rows --- #
+    return stream_page(
         "index.html",
-        result=result,
+        rows=result,
+        total=total,
+        rows_url=rows_url,
+        page_size=STREAM_ROWS,
+        hits=hits,
         patterns=patterns,
+        corpus_id=corpus_id,
+        dispersion=dispersion,
+        layers=LAYERS,
         pos_tags=POS_TAGS,
         ent_labels=ENT_LABELS
     )
 
+# --------------------------------------------------------------------------- #
+# Corpus statistics (JSON) – served from the cached positional index          #
+# --------------------------------------------------------------------------- #
+def _cached_index(corpus_id):
+    index = lookup_corpus(corpus_id)
+    if index is None:
+        abort(404, description="Unknown corpus id; run a search on the corpus first.")
+    return index
+
+
+@app.route("/freq/<corpus_id>")
+def freq_view(corpus_id):
+    """
+    Top-N frequency list.
+
+    Query parameters: layer (word / lemma / pos), n (1..MAX_NGRAM), top.
+    """
+    layer = request.args.get("layer", "word")
+    n     = request.args.get("n", 1, type=int)
+    top   = max(0, request.args.get("top", 20, type=int))
+    if layer not in LAYERS or not 1 <= n <= MAX_NGRAM:
+        abort(400, description=f"layer must be one of {LAYERS}; n must be 1..{MAX_NGRAM}")
+
+    if DAEMON_SOCKET:
+        fl = _daemon("freq", corpus_id=corpus_id, layer=layer, n=n, top=top)
+        total, types, items = fl["total"], fl["types"], fl["items"]
+    else:
+        index = _cached_index(corpus_id)
+        fl    = index.freq_list(layer, n)
+        total, types, items = fl.total, len(fl), index.top_ngrams(layer, n, top)
+    return jsonify({
+        "layer": layer,
+        "n":     n,
+        "total": total,
+        "types": types,
+        "items": [{"ngram": g, "count": c} for g, c in items],
+    })
+
+
+@app.route("/dispersion/<corpus_id>")
+def dispersion_view(corpus_id):
+    """
+    Dispersion statistics for a query.
+
+    Query parameters: search_type, target, the optional near_* proximity
+    parameters (see search()), parts (optional number of equal-sized parts;
+    by default each document is a part).
+    """
+    n_parts = request.args.get("parts", None, type=int)
+
+    if DAEMON_SOCKET:
+        query = {f: request.args[f] for f in QUERY_FIELDS if f in request.args}
+        stats = _daemon("dispersion", corpus_id=corpus_id, parts=n_parts, **query)["stats"]
+    else:
+        index   = _cached_index(corpus_id)
+        matches = search(index, request.args, tokenize)
+        stats   = index.dispersion([i for i, _ in matches], n_parts=n_parts)
+    return jsonify(dict(stats, search_type=request.args.get("search_type", "token"),
+                        target=request.args.get("target", "")))
+
+@app.errorhandler(HTTPException)
+def json_error(e):
+    """Errors of the JSON endpoints are JSON ({"error": ...}) too, so scripts and the table can read them."""
+    if request.endpoint not in ("freq_view", "dispersion_view", "rows_view"):
+        return e
+    return jsonify({"error": e.description}), e.code
+
+
+@app.route("/rows/<corpus_id>")
+def rows_view(corpus_id):
+    """
+    A slice of the KWIC rows for a query, for the virtualized result table.
+
+    Query parameters: the search form fields (see QUERY_FIELDS), offset, limit.
+    """
+    index  = None if DAEMON_SOCKET else _cached_index(corpus_id)
+    offset = max(0, request.args.get("offset", 0, type=int))
+    limit  = max(0, min(request.args.get("limit", STREAM_ROWS, type=int), ROWS_PAGE_MAX))
+
+    total, rows, _, _, _ = query_page(corpus_id, index, request.args, offset, limit)
+    return jsonify({
+        "total":  total,
+        "offset": offset,
+        "rows":   [[r["left"], r["mid"], r["right"], r["mid_html"]] for r in rows],
+    })
+
+# --------------------------------------------------------------------------- #
+# Serving                                                                     #
+# --------------------------------------------------------------------------- #
+def create_server(host, port, threads=8):
+    """
+    Production WSGI server (waitress) with a pool of `threads` workers.
+
+    Returns the server object; call .run() to serve and .close() to stop.
+    """
+    from waitress.server import create_server as waitress_server
+    return waitress_server(app, host=host, port=port, threads=threads)
+
+
 # --------------------------------------------------------------------------- #
 if __name__ == "__main__":
-    # Run Flask development server
-    app.run(debug=True, host="0.0.0.0", port=int(os.environ.get("PORT", 5000)))
+    parser = argparse.ArgumentParser(description="KWIC Web App")
+    parser.add_argument("--serve", action="store_true",
+                        help="run the production server (waitress thread pool) instead of the Flask debug server")
+    parser.add_argument("--threads", type=int, default=8, help="worker threads for --serve (default: 8)")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=int(os.environ.get("PORT", 5000)))
+    args = parser.parse_args()
+
+    if args.serve:
+        print(f"Serving on http://{args.host}:{args.port} with {args.threads} threads")
+        create_server(args.host, args.port, threads=args.threads).run()
+    else:
+        # Run Flask development server
+        app.run(debug=True, host=args.host, port=args.port)
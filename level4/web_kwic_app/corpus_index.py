@@ -0,0 +1,707 @@
+# -*- coding: utf-8 -*-
+"""
+Positional index over one or more spaCy-parsed documents.
+
+Algorithm overview:
+  - Parses are flattened once into compact integer arrays (one id per token for
+    each layer: lower-cased word, lower-cased lemma, POS, entity type).
+  - Each layer keeps a posting list (sorted token positions) per type id, so
+    searches jump straight to candidate positions instead of rescanning tokens.
+  - Sentence and document boundaries are kept as sorted offset tables and are
+    looked up with bisect.
+  - Frequency lists (word / lemma / POS n-grams, n = 1..4) are stored as
+    parallel id arrays (one per n-gram position) plus a descending count
+    array, built from the id arrays on first use.
+  - Proximity queries merge two sorted span lists (token / lemma / POS posting
+    matches, or the start-sorted entity interval list) in a single forward
+    pass, with sentence bounds taken from the sentence offset table.
+  - Sampling draws candidate indices straight from a posting list (or the
+    entity list) with a seeded RNG and verifies only those, stopping once N
+    hits are found; single-term hit counts are posting-list lengths.
+  - Dependency parses are kept as a head-position array and a relation-label
+    array, plus an index (head lemma, relation) -> dependent positions, so
+    dependency queries never touch spaCy Token objects.
+  - Collocates are counted over the window around each hit, one id-array
+    slice per hit, and scored against posting-list frequencies (MI, t-score,
+    logDice).
+  - Dispersion measures (range, Juilland's D, Gries' DP) are computed from the
+    posting positions and the part boundaries alone.
+"""
+
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import Counter
+import hashlib
+import heapq
+from itertools import accumulate
+import math
+import pickle
+import random
+import threading
+
+LAYERS = ("word", "lemma", "pos")
+SEARCH_TYPES = ("token", "lemma", "pos", "entity", "dep")
+ORDERS = ("any", "before", "after")
+MAX_NGRAM = 4
+DEFAULT_PARTS = 10
+MEASURES = ("mi", "t", "logdice")
+
+
+def corpus_key(text):
+    """Stable id for a corpus text (content hash)."""
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:16]
+
+
+class Vocab:
+    """Bidirectional string <-> integer id table for one layer."""
+
+    def __init__(self):
+        self.strings = [""]          # id 0 is reserved for "no value"
+        self.ids     = {"": 0}
+
+    def add(self, s):
+        i = self.ids.get(s)
+        if i is None:
+            i = self.ids[s] = len(self.strings)
+            self.strings.append(s)
+        return i
+
+    def get(self, s):
+        return self.ids.get(s)
+
+    def __len__(self):
+        return len(self.strings)
+
+
+class FreqList:
+    """
+    Frequency list for one (layer, n) pair.
+
+    columns[j][i] is the j-th type id of entry i and counts[i] its
+    frequency, all compact int arrays ordered by descending count, so the
+    top N entries are a slice.
+    """
+
+    def __init__(self, counter, n):
+        items        = sorted(counter.items(), key=lambda kv: (-kv[1], kv[0]))
+        self.columns = [array("i", (k[j] for k, _ in items)) for j in range(n)]
+        self.counts  = array("l", (c for _, c in items))
+        self.total   = sum(self.counts)
+
+    def __len__(self):
+        return len(self.counts)
+
+    def key(self, i):
+        """Type ids of entry `i`."""
+        return tuple(col[i] for col in self.columns)
+
+    def top(self, n):
+        return [(self.key(i), self.counts[i]) for i in range(min(max(0, n), len(self.counts)))]
+
+
+class Concat:
+    """Several position arrays read as one sequence (no overall order), without copying them."""
+
+    def __init__(self, parts):
+        self.parts  = parts
+        self.starts = list(accumulate((len(p) for p in parts), initial=0))
+
+    def __len__(self):
+        return self.starts[-1]
+
+    def __getitem__(self, i):
+        k = bisect_right(self.starts, i) - 1
+        return self.parts[k][i - self.starts[k]]
+
+
+def parse_dep_query(target):
+    """
+    Parse a dependency query "REL HEAD [DEP_POS]".
+
+      REL     – dependency label (dobj, amod, nsubj, ...) or * for any
+      HEAD    – head lemma, optionally with a POS (make/VERB), or * for any
+                head (*/NOUN: any noun)
+      DEP_POS – optional POS tag the dependent must carry
+
+    e.g. "dobj make/VERB" (objects of the verb make), "amod house ADJ"
+    (adjectives modifying house). Returns a dict with rel, head, head_pos and
+    dep_pos (None = unconstrained).
+    """
+    parts = target.split()
+    if not 2 <= len(parts) <= 3:
+        raise ValueError("dependency query must be 'REL HEAD [DEP_POS]', e.g. 'dobj make/VERB'")
+    head, _, head_pos = parts[1].partition("/")
+    return {
+        "rel":      None if parts[0] == "*" else parts[0],
+        "head":     None if head == "*" else head.lower(),
+        "head_pos": head_pos.upper() or None,
+        "dep_pos":  parts[2].upper() if len(parts) == 3 else None,
+    }
+
+
+def dep_span(dependent, head):
+    """(start, length) covering a dependent and its head; they are its two end tokens."""
+    start = min(dependent, head)
+    return start, max(dependent, head) - start + 1
+
+
+def pair_spans(pairs):
+    """Collapse near() pairs into sorted, de-duplicated covering spans (start, length)."""
+    spans = {(min(a, b), max(a + al, b + bl) - min(a, b)) for a, al, b, bl in pairs}
+    return sorted(spans)
+
+
+class CorpusIndex:
+    """
+    Token-level positional index over a sequence of parsed documents.
+
+    Token positions are global: document k occupies
+    [doc_starts[k], doc_starts[k + 1]).
+    """
+
+    def __init__(self):
+        self.texts      = []                                   # surface forms, for display
+        self.spaces     = array("b")                           # 1 if token has trailing whitespace
+        self.vocabs     = {layer: Vocab() for layer in LAYERS}
+        self.ids        = {layer: array("i") for layer in LAYERS}
+        self.postings   = {layer: {} for layer in LAYERS}
+        self.ent_vocab  = Vocab()
+        self.ent_type   = array("i")                           # per-token entity label id (0 = none)
+        self.ents       = []                                   # (start, end, label_id), sorted by start
+        self.ent_by_label = {}                                 # label_id -> indices into self.ents
+        self.sent_starts = array("i")
+        self.doc_starts  = array("i")
+        self.heads      = array("i")                           # per-token head position (self for roots)
+        self.dep_vocab  = Vocab()
+        self.deps       = array("i")                           # per-token dependency label id
+        self.dependents = {}                                   # head lemma id -> {label id -> dependent positions}
+        self.by_rel     = {}                                   # label id -> dependent positions
+        self._freq_cache = {}
+        self._freq_lock  = threading.Lock()                    # guards the lazy frequency tables
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_freq_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._freq_lock = threading.Lock()
+
+    # ----------------------------------------------------------------------- #
+    # Construction                                                            #
+    # ----------------------------------------------------------------------- #
+    @classmethod
+    def from_docs(cls, docs):
+        """Build an index from an iterable of spaCy Doc objects."""
+        index = cls()
+        for doc in docs:
+            index._add_doc(doc)
+        index._finalize()
+        return index
+
+    def _add_doc(self, doc):
+        offset = len(self.texts)
+        self.doc_starts.append(offset)
+
+        for tok in doc:
+            self.texts.append(tok.text)
+            self.spaces.append(1 if tok.whitespace_ else 0)
+            for layer, value in (("word",  tok.text.lower()),
+                                 ("lemma", tok.lemma_.lower()),
+                                 ("pos",   tok.pos_)):
+                type_id = self.vocabs[layer].add(value)
+                self.ids[layer].append(type_id)
+                self.postings[layer].setdefault(type_id, array("i")).append(offset + tok.i)
+            self.ent_type.append(self.ent_vocab.add(tok.ent_type_) if tok.ent_type_ else 0)
+
+        lemma_ids = self.ids["lemma"]
+        for tok in doc:
+            pos, head = offset + tok.i, offset + tok.head.i
+            rel_id = self.dep_vocab.add(tok.dep_)
+            self.heads.append(head)
+            self.deps.append(rel_id)
+            if head != pos:
+                by_head = self.dependents.setdefault(lemma_ids[head], {})
+                by_head.setdefault(rel_id, array("i")).append(pos)
+                self.by_rel.setdefault(rel_id, array("i")).append(pos)
+
+        for sent in doc.sents:
+            self.sent_starts.append(offset + sent.start)
+
+        for ent in doc.ents:
+            label_id = self.ent_vocab.add(ent.label_)
+            self.ents.append((offset + ent.start, offset + ent.end, label_id))
+
+    def _finalize(self):
+        for k, (_, _, label_id) in enumerate(self.ents):
+            self.ent_by_label.setdefault(label_id, []).append(k)
+
+    def __len__(self):
+        return len(self.texts)
+
+    def save(self, path):
+        """Write the index to `path` so later runs can skip parsing."""
+        with open(path, "wb") as f:
+            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @staticmethod
+    def load(path):
+        with open(path, "rb") as f:
+            return pickle.load(f)
+
+    # ----------------------------------------------------------------------- #
+    # Lookups                                                                 #
+    # ----------------------------------------------------------------------- #
+    def doc_of(self, pos):
+        return bisect_right(self.doc_starts, pos) - 1
+
+    def doc_bounds(self, k):
+        end = self.doc_starts[k + 1] if k + 1 < len(self.doc_starts) else len(self.texts)
+        return self.doc_starts[k], end
+
+    def sent_id(self, pos):
+        return bisect_right(self.sent_starts, pos) - 1
+
+    def sent_bounds(self, pos):
+        """Return (start, end) of the sentence containing token `pos`."""
+        k   = bisect_right(self.sent_starts, pos) - 1
+        end = self.sent_starts[k + 1] if k + 1 < len(self.sent_starts) else len(self.texts)
+        return self.sent_starts[k], end
+
+    def span_bounds(self, start, length):
+        """
+        Return (start, end) of the text a span's context may use: from the
+        start of its first token's sentence to the end of its last token's
+        sentence (a proximity pair may cross a sentence boundary).
+        """
+        lo, hi = self.sent_bounds(start)
+        if start + length > hi:
+            hi = self.sent_bounds(start + length - 1)[1]
+        return lo, hi
+
+    def positions(self, layer, value):
+        """Posting list (sorted positions) for a single layer value."""
+        type_id = self.vocabs[layer].get(value)
+        if type_id is None:
+            return array("i")
+        return self.postings[layer][type_id]
+
+    def match_sequence(self, layer, values):
+        """
+        Find every occurrence of the value sequence on `layer`.
+
+        Candidates come from the posting list of the first value; the rest of
+        the sequence is checked against the id array. Matches never cross a
+        document boundary. Returns a list of (start, length).
+        """
+        if not values:
+            return []
+        vocab = self.vocabs[layer]
+        want  = [vocab.get(v) for v in values]
+        if any(w is None for w in want):
+            return []
+
+        ids, n, matches = self.ids[layer], len(want), []
+        for p in self.postings[layer][want[0]]:
+            if p + n > len(ids):
+                break
+            if all(ids[p + j] == want[j] for j in range(1, n)):
+                if n == 1 or self.doc_of(p) == self.doc_of(p + n - 1):
+                    matches.append((p, n))
+        return matches
+
+    def match_entities(self, label):
+        """Return (start, length) for every entity with the given label."""
+        label_id = self.ent_vocab.get(label)
+        if label_id is None:
+            return []
+        out = []
+        for k in self.ent_by_label.get(label_id, ()):
+            start, end, _ = self.ents[k]
+            out.append((start, end - start))
+        return out
+
+    def find(self, search_type, terms):
+        """
+        Resolve a query to a list of (start, length).
+
+          * token  – `terms` is a token sequence, matched case-insensitively
+          * lemma  – `terms` is a lemma sequence, matched case-insensitively
+          * pos    – `terms` is a POS tag sequence
+          * entity – `terms[0]` is an entity label
+          * dep    – `terms` joined is a parse_dep_query() string; each
+                     dependent/head pair is returned as the span covering both
+        """
+        if search_type == "token":
+            return self.match_sequence("word", [t.lower() for t in terms])
+        if search_type == "lemma":
+            return self.match_sequence("lemma", [t.lower() for t in terms])
+        if search_type == "pos":
+            return self.match_sequence("pos", list(terms))
+        if search_type == "entity":
+            return self.match_entities(terms[0].upper()) if terms else []
+        if search_type == "dep":
+            return sorted(dep_span(d, h) for d, h in self.find_deps(" ".join(terms)))
+        raise ValueError(f"search_type must be one of: {', '.join(SEARCH_TYPES)}")
+
+    def near(self, anchors, others, max_dist, order="any", same_sentence=True):
+        """
+        Pair every anchor span with the `others` spans within `max_dist` tokens.
+
+        Both inputs are lists of (start, length) sorted by start, as returned
+        by find(). Distance is counted between the nearest edges, so adjacent
+        spans are 1 apart and overlapping spans 0. `order` restricts where the
+        other span may lie: "before" or "after" the anchor, or "any" (which
+        also admits overlaps). With `same_sentence`, both spans must lie in the
+        anchor's sentence; otherwise they must at least share a document.
+
+        The scan keeps a lower pointer into `others` that only moves forward,
+        so the cost is O(len(anchors) + len(others) + pairs) for non-nested
+        span lists. Returns a list of (a_start, a_len, b_start, b_len).
+        """
+        if order not in ORDERS:
+            raise ValueError(f"order must be one of: {', '.join(ORDERS)}")
+
+        pairs, lo, n_others = [], 0, len(others)
+        for a_start, a_len in anchors:
+            a_end = a_start + a_len
+            # Drop spans that end more than max_dist tokens before this anchor
+            while lo < n_others and others[lo][0] + others[lo][1] <= a_start - max_dist:
+                lo += 1
+
+            if same_sentence:
+                lo_bound, hi_bound = self.sent_bounds(a_start)
+            else:
+                lo_bound, hi_bound = self.doc_bounds(self.doc_of(a_start))
+            if a_end > hi_bound:
+                continue
+
+            j = lo
+            while j < n_others and others[j][0] <= a_end - 1 + max_dist:
+                b_start, b_len = others[j]
+                b_end = b_start + b_len
+                j += 1
+                if (b_start, b_len) == (a_start, a_len):
+                    continue
+                if b_end <= a_start:
+                    rel, dist = "before", a_start - (b_end - 1)
+                elif b_start >= a_end:
+                    rel, dist = "after", b_start - (a_end - 1)
+                else:
+                    rel, dist = "any", 0
+                if dist > max_dist or (order != "any" and rel != order):
+                    continue
+                if b_start < lo_bound or b_end > hi_bound:
+                    continue
+                pairs.append((a_start, a_len, b_start, b_len))
+        return pairs
+
+    def _candidates(self, search_type, terms):
+        """
+        Candidate hits for a query without enumerating them.
+
+        Returns (size, span_at, verify, certain): candidate count, a function
+        mapping a candidate number to its (start, length), a predicate telling
+        whether a candidate number really matches, and whether every candidate
+        is known to match (single-term, entity and unfiltered dependency
+        queries).
+        """
+        if search_type == "entity":
+            label_id = self.ent_vocab.get(terms[0].upper()) if terms else None
+            members  = self.ent_by_label.get(label_id, [])
+
+            def span_at(i):
+                start, end, _ = self.ents[members[i]]
+                return start, end - start
+            return len(members), span_at, lambda i: True, True
+
+        if search_type == "dep":
+            lists, accept, certain = self._dep_candidates(parse_dep_query(" ".join(terms)))
+            cands = lists[0] if len(lists) == 1 else Concat(lists)   # drawn by cumulative length
+
+            def span_at(i):
+                return dep_span(cands[i], self.heads[cands[i]])
+
+            return len(cands), span_at, lambda i: accept(cands[i]), certain
+
+        if search_type not in ("token", "lemma", "pos"):
+            raise ValueError(f"search_type must be one of: {', '.join(SEARCH_TYPES)}")
+        layer  = "word" if search_type == "token" else search_type
+        values = list(terms) if search_type == "pos" else [t.lower() for t in terms]
+        want   = [self.vocabs[layer].get(v) for v in values]
+        if not want or any(w is None for w in want):
+            return 0, None, None, True
+
+        ids, n = self.ids[layer], len(want)
+        post   = self.postings[layer][want[0]]
+
+        def verify(i):
+            p = post[i]
+            return (p + n <= len(ids)
+                    and all(ids[p + j] == want[j] for j in range(1, n))
+                    and self.doc_of(p) == self.doc_of(p + n - 1))
+        return len(post), lambda i: (post[i], n), verify, n == 1
+
+    def _dep_candidates(self, q):
+        """
+        Dependent positions for a parsed dependency query.
+
+        Returns (lists, accept, certain): the sorted dependent-position lists
+        of the (head lemma, relation) index that the query covers (several
+        for a "*" relation or head; they are not merged here, so sampling
+        stays O(N)), a predicate applying the POS constraints to a dependent
+        position, and whether every candidate matches.
+        """
+        rel_id = None
+        if q["rel"] is not None:
+            rel_id = self.dep_vocab.get(q["rel"])
+            if rel_id is None:
+                return [[]], None, True
+
+        if q["head"] is None:
+            lists = [self.by_rel.get(rel_id, [])] if rel_id is not None else list(self.by_rel.values())
+        else:
+            head_id = self.vocabs["lemma"].get(q["head"])
+            by_head = self.dependents.get(head_id, {}) if head_id is not None else {}
+            lists   = [by_head.get(rel_id, [])] if rel_id is not None else list(by_head.values())
+
+        pos_ids  = self.ids["pos"]
+        head_pos = self.vocabs["pos"].get(q["head_pos"]) if q["head_pos"] else None
+        dep_pos  = self.vocabs["pos"].get(q["dep_pos"])  if q["dep_pos"]  else None
+        if (q["head_pos"] and head_pos is None) or (q["dep_pos"] and dep_pos is None) or not lists:
+            return [[]], None, True
+
+        def accept(d):
+            return ((head_pos is None or pos_ids[self.heads[d]] == head_pos)
+                    and (dep_pos is None or pos_ids[d] == dep_pos))
+        return lists, accept, head_pos is None and dep_pos is None
+
+    def find_deps(self, target):
+        """
+        Resolve a dependency query (see parse_dep_query) to (dependent, head)
+        position pairs, in dependent order.
+        """
+        lists, accept, certain = self._dep_candidates(parse_dep_query(target))
+        cands = lists[0] if len(lists) == 1 else heapq.merge(*lists)
+        if certain:
+            return [(d, self.heads[d]) for d in cands]
+        return [(d, self.heads[d]) for d in cands if accept(d)]
+
+    def sample(self, search_type, terms, k, seed=0, accept=None):
+        """
+        Reproducible random sample of up to `k` hits of a find() query.
+
+        Candidate numbers are drawn with random.Random(seed) and only those are
+        verified (plus `accept(start)`, if given), stopping at `k` hits. A
+        first round draws 2k candidates; only if too few of them match is the
+        rest of the candidate list visited, in seeded random order.
+
+        Returns (spans, total, exact): the sampled (start, length) spans in
+        corpus order, the hit count and whether that count is exact. Counts
+        for single-term and entity queries are candidate-list lengths; when
+        candidates may fail (phrases, `accept`) and the scan stopped early,
+        the count is extrapolated from the acceptance rate.
+        """
+        size, span_at, verify, certain = self._candidates(search_type, terms)
+        if not size or k <= 0:
+            return [], size, True
+
+        rng     = random.Random(seed)
+        order   = rng.sample(range(size), min(size, 2 * k))
+        picked, seen = [], set()
+        while True:
+            for i in order:
+                if i in seen:
+                    continue
+                seen.add(i)
+                span = span_at(i)
+                if verify(i) and (accept is None or accept(span[0])):
+                    picked.append(span)
+                    if len(picked) == k:
+                        break
+            if len(picked) == k or len(seen) == size:
+                break
+            order = rng.sample(range(size), size)
+
+        if certain and accept is None:
+            total, exact = size, True
+        elif len(seen) == size:
+            total, exact = len(picked), True
+        else:
+            total, exact = round(size * len(picked) / len(seen)), False
+        return sorted(picked), total, exact
+
+    def hit_positions(self, search_type, terms):
+        """
+        Sorted start positions of every hit, straight from the index, for
+        queries whose candidates all match (None for phrase queries and
+        POS-filtered dependency queries).
+        """
+        size, span_at, _, certain = self._candidates(search_type, terms)
+        if not certain:
+            return None
+        if search_type == "pos":
+            return self.positions("pos", terms[0])
+        if search_type in ("token", "lemma"):
+            return self.positions("word" if search_type == "token" else "lemma", terms[0].lower())
+        return sorted(span_at(i)[0] for i in range(size))
+
+    def ent_label(self, pos):
+        return self.ent_vocab.strings[self.ent_type[pos]]
+
+    def value(self, layer, pos):
+        return self.vocabs[layer].strings[self.ids[layer][pos]]
+
+    # ----------------------------------------------------------------------- #
+    # Frequency lists                                                         #
+    # ----------------------------------------------------------------------- #
+    def freq_list(self, layer="word", n=1):
+        """
+        Frequency list of `layer` n-grams (1 <= n <= MAX_NGRAM).
+
+        N-grams do not cross sentence boundaries. Unigram counts come straight
+        from posting-list lengths; longer n-grams are counted in one pass over
+        the id array. Results are cached per (layer, n).
+        """
+        if layer not in LAYERS:
+            raise ValueError(f"layer must be one of: {', '.join(LAYERS)}")
+        if not 1 <= n <= MAX_NGRAM:
+            raise ValueError(f"n must be between 1 and {MAX_NGRAM}")
+
+        key = (layer, n)
+        fl  = self._freq_cache.get(key)
+        if fl is not None:
+            return fl
+        with self._freq_lock:
+            if key in self._freq_cache:
+                return self._freq_cache[key]
+            if n == 1:
+                counter = {(t,): len(p) for t, p in self.postings[layer].items()}
+            else:
+                counter = Counter()
+                ids     = self.ids[layer]
+                bounds  = list(self.sent_starts) + [len(ids)]
+                for s, e in zip(bounds, bounds[1:]):
+                    # n shifted slices of the sentence zip into its n-grams
+                    counter.update(zip(*(ids[s + j:e - n + 1 + j] for j in range(n))))
+            fl = self._freq_cache[key] = FreqList(counter, n)
+        return fl
+
+    def top_ngrams(self, layer="word", n=1, top=20):
+        """Return [(ngram_string, count), ...] for the `top` most frequent n-grams."""
+        strings = self.vocabs[layer].strings
+        return [(" ".join(strings[t] for t in key), count)
+                for key, count in self.freq_list(layer, n).top(top)]
+
+    # ----------------------------------------------------------------------- #
+    # Collocation                                                             #
+    # ----------------------------------------------------------------------- #
+    def collocates(self, spans, layer="lemma", left=5, right=5, measure="logdice",
+                   min_freq=2, top=20):
+        """
+        Collocates of the hits at `spans` ((start, length), as from find()).
+
+        Words of `layer` within `left` / `right` tokens of each hit, in the
+        hit's sentence(s), are counted once per window position. Each collocate is
+        scored with:
+          * mi      – log2(O / E), E = f(node) * f(coll) * window / N
+          * t       – (O - E) / sqrt(O)
+          * logdice – 14 + log2(2 * O / (f(node) + f(coll)))
+        Returns [(collocate, observed, f(coll), score), ...] by descending
+        score, for collocates seen at least `min_freq` times.
+        """
+        if layer not in LAYERS:
+            raise ValueError(f"layer must be one of: {', '.join(LAYERS)}")
+        if measure not in MEASURES:
+            raise ValueError(f"measure must be one of: {', '.join(MEASURES)}")
+
+        ids, observed, span_total = self.ids[layer], Counter(), 0
+        for start, length in spans:
+            s_start, s_end = self.span_bounds(start, length)
+            lo, hi = max(s_start, start - left), min(s_end, start + length + right)
+            observed.update(ids[lo:start])
+            observed.update(ids[start + length:hi])
+            span_total += (start - lo) + (hi - start - length)
+
+        f_node, size = len(spans), len(self.texts)
+        if not f_node or not size:
+            return []
+        window   = span_total / f_node
+        strings  = self.vocabs[layer].strings
+        postings = self.postings[layer]
+
+        scored = []
+        for type_id, o in observed.items():
+            if o < min_freq:
+                continue
+            f_coll = len(postings[type_id])
+            e = f_node * f_coll * window / size
+            if measure == "mi":
+                score = math.log2(o / e)
+            elif measure == "t":
+                score = (o - e) / math.sqrt(o)
+            else:
+                score = 14 + math.log2(2 * o / (f_node + f_coll))
+            scored.append((strings[type_id], o, f_coll, score))
+        scored.sort(key=lambda c: (-c[3], -c[1], c[0]))
+        return scored[:top]
+
+    # ----------------------------------------------------------------------- #
+    # Dispersion                                                              #
+    # ----------------------------------------------------------------------- #
+    def part_bounds(self, n_parts=None):
+        """
+        Corpus parts used for dispersion, as a list of start offsets.
+
+        With several documents and no `n_parts`, each document is a part;
+        otherwise the corpus is cut into `n_parts` (default DEFAULT_PARTS)
+        contiguous parts of near-equal size.
+        """
+        if n_parts is None and len(self.doc_starts) > 1:
+            return list(self.doc_starts)
+        n_parts = max(1, min(n_parts or DEFAULT_PARTS, len(self.texts) or 1))
+        size    = len(self.texts)
+        return [size * k // n_parts for k in range(n_parts)]
+
+    def dispersion(self, positions, n_parts=None):
+        """
+        Dispersion of the hits at sorted `positions` across corpus parts.
+
+        Returns a dict with:
+          * freq   – total hits
+          * parts  – number of parts
+          * range  – number of parts with at least one hit
+          * juilland_d – Juilland's D on size-normalised part frequencies
+          * dp, dp_norm – Gries' deviation of proportions (and normalised DP)
+        """
+        starts = self.part_bounds(n_parts)
+        ends   = starts[1:] + [len(self.texts)]
+        total  = len(self.texts)
+        freq   = len(positions)
+
+        counts = [bisect_left(positions, e) - bisect_left(positions, s)
+                  for s, e in zip(starts, ends)]
+        sizes  = [e - s for s, e in zip(starts, ends)]
+        n      = len(starts)
+
+        result = {"freq": freq, "parts": n,
+                  "range": sum(1 for c in counts if c),
+                  "juilland_d": None, "dp": None, "dp_norm": None}
+        if not freq or not total:
+            return result
+
+        # Juilland's D: 1 - V / sqrt(n - 1), V = coefficient of variation
+        if n > 1:
+            rel  = [c / sz if sz else 0.0 for c, sz in zip(counts, sizes)]
+            mean = sum(rel) / n
+            sd   = math.sqrt(sum((r - mean) ** 2 for r in rel) / n)
+            result["juilland_d"] = 1 - (sd / mean) / math.sqrt(n - 1) if mean else None
+
+        # Gries' DP: half the summed gap between observed and expected proportions
+        expected = [sz / total for sz in sizes]
+        dp = 0.5 * sum(abs(c / freq - s) for c, s in zip(counts, expected))
+        result["dp"] = dp
+        min_s = min(expected)
+        result["dp_norm"] = dp / (1 - min_s) if min_s < 1 else None
+        return result
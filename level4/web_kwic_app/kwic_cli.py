@@ -0,0 +1,294 @@
+# -*- coding: utf-8 -*-
+"""
+Non-interactive batch KWIC: parse the corpus once, then run many queries.
+
+Usage:
+  python kwic_cli.py corpus1.txt corpus2.txt -q queries.txt
+  cat queries.txt | python kwic_cli.py corpus.txt --color never
+  python kwic_cli.py corpus.txt --save-index corpus.idx -q queries.txt
+  python kwic_cli.py --load-index corpus.idx -q queries.txt
+
+Query file format (one query per line; blank lines and '#' comments skipped):
+  token: natural language
+  lemma: pledge
+  pos: ADJ NOUN
+  entity: MONEY
+  dep: dobj make/VERB
+  {"search_type": "lemma", "target": "make", "window": 3, "sort_mode": "token_freq"}
+  near: lemma:pledge ; entity:MONEY ; 5 ; after
+
+A bare line without a "type:" prefix is a token query. JSON lines may
+override window / sort_mode / color / attrs / sample / seed for that query
+only.
+
+Dependency ("dep:") lines give a relation, a head lemma (optionally /POS)
+and an optional dependent POS, "*" matching anything; both the dependent
+and its head are highlighted.
+
+Proximity ("near:") lines give two "type:target" terms, a maximum distance
+in tokens and an optional order (any / before / after: where the second
+term may lie relative to the first); add "; cross" to allow matches across
+sentences. As JSON: {"search_type": "near", "target": "lemma:pledge",
+"near": "entity:MONEY", "max_dist": 5, "order": "after"}.
+
+Algorithm overview:
+  - Each corpus file becomes one document; all are parsed in a single
+    nlp.pipe() pass (or the index is loaded from --load-index).
+  - Every query is resolved against the same CorpusIndex (posting lists), so
+    the cost per query is proportional to its hits, not to the corpus size.
+    Matching and sorting are kwic_search's, as in the web app and the
+    daemon: token / lemma targets are split by the spaCy model, hits
+    starting on ( ) , . : ; are skipped (except for entity / dep queries).
+  - With --sample N, non-proximity queries print a seeded random sample of N
+    lines (CorpusIndex.sample), so frequent queries cost O(N) instead of
+    O(hits); the header then reports the index-based hit count.
+  - Output per query mirrors the level1–level3 scripts: a header line, then
+    one KWIC line per hit with the keyword optionally colored by termcolor.
+"""
+
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import json
+import multiprocessing
+import os
+import sys
+import threading
+
+from termcolor import colored
+
+from corpus_index import CorpusIndex, ORDERS, SEARCH_TYPES, parse_dep_query
+import kwic_search
+
+COLORS      = {'grey', 'red', 'green', 'yellow', 'blue', 'magenta', 'cyan', 'white'}
+VALID_ATTRS = {'bold', 'underline', 'blink', 'reverse', 'concealed'}
+SORT_MODES  = {'sequential', 'token_freq', 'pos_freq'}
+PARSE_WORKERS = 2               # default number of parse_pool() processes
+
+_nlp      = None
+_nlp_lock = threading.RLock()   # held by every call into this process's pipeline (threads share it)
+
+
+def get_nlp(model):
+    """Load the spaCy model on first use (with --load-index, only token / lemma targets need it)."""
+    global _nlp
+    with _nlp_lock:
+        if _nlp is None:
+            import spacy
+            _nlp = spacy.load(model)
+    return _nlp
+
+
+def read_corpus(path):
+    """Read a .txt corpus file as UTF-8, falling back to Shift_JIS."""
+    with open(path, 'rb') as f:
+        raw = f.read()
+    for enc in ('utf-8', 'shift_jis'):
+        try:
+            return raw.decode(enc)
+        except UnicodeDecodeError:
+            continue
+    raise ValueError(f"Unable to decode {path}. Use UTF-8 or Shift_JIS.")
+
+
+def build_index(paths, model):
+    return parse_texts([read_corpus(p) for p in paths], model)
+
+
+def parse_texts(texts, model):
+    """Parse each text as one document (newlines folded into spaces) into a CorpusIndex."""
+    nlp = get_nlp(model)
+    with _nlp_lock:
+        return CorpusIndex.from_docs(nlp.pipe(t.replace('\n', ' ') for t in texts))
+
+
+def parse_pool(model, workers=PARSE_WORKERS):
+    """
+    Worker processes for parse_texts(), for servers that answer queries meanwhile.
+
+    Each worker loads a pipeline of its own, so a long parse never holds the
+    server's _nlp_lock; the index is sent back pickled. Workers are spawned
+    rather than forked, since a forked child could inherit a lock held by
+    one of the server's threads.
+    """
+    return ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('spawn'),
+                               initializer=get_nlp, initargs=(model,))
+
+
+def tokenize(text, model):
+    """(text, lemma) pairs of a short text such as a query target."""
+    nlp = get_nlp(model)
+    with _nlp_lock:
+        return [(tok.text, tok.lemma_) for tok in nlp(text)]
+
+
+def parse_query(line, defaults):
+    """Turn one query-file line into a dict of query options (or None to skip)."""
+    line = line.strip()
+    if not line or line.startswith('#'):
+        return None
+
+    query = dict(defaults)
+    if line.startswith('{'):
+        query.update(json.loads(line))
+    else:
+        head, sep, rest = line.partition(':')
+        if sep and head.strip().lower() == 'near':
+            fields = [f.strip() for f in rest.split(';')]
+            if len(fields) < 3:
+                raise ValueError("near: expects 'type:target ; type:target ; distance [; order] [; cross]'")
+            query['search_type'], query['target'], query['near'] = 'near', fields[0], fields[1]
+            query['max_dist'] = int(fields[2])
+            for opt in fields[3:]:
+                if opt == 'cross':
+                    query['same_sentence'] = False
+                else:
+                    query['order'] = opt
+        elif sep and head.strip().lower() in SEARCH_TYPES:
+            query['search_type'], query['target'] = head.strip().lower(), rest.strip()
+        else:
+            query['search_type'], query['target'] = 'token', line
+
+    # JSON lines can carry anything; check types here so a bad line is reported, not fatal
+    for key in ('target', 'near', 'sort_mode', 'color', 'order', 'joiner', 'context'):
+        if key in query and not isinstance(query[key], str):
+            raise ValueError(f"{key} must be a string, got {query[key]!r}")
+    for key in ('window', 'sample', 'seed', 'max_dist'):
+        if key in query:
+            try:
+                query[key] = int(query[key])
+            except (TypeError, ValueError):
+                raise ValueError(f"{key} must be an integer, got {query[key]!r}") from None
+            if key != 'seed' and query[key] < 0:
+                raise ValueError(f"{key} must not be negative")
+    for key in ('attrs', 'exclude'):
+        value = query.get(key, [])
+        if not isinstance(value, list) or not all(isinstance(a, str) for a in value):
+            raise ValueError(f"{key} must be a list of strings, got {value!r}")
+    if not isinstance(query.get('same_sentence', True), bool):
+        raise ValueError(f"same_sentence must be true or false, got {query['same_sentence']!r}")
+
+    if not query.get('target', '').strip():
+        raise ValueError("empty target")
+    if query.get('search_type') == 'near':
+        for term in (query['target'], query.get('near', '')):
+            term_type, _, term_target = term.partition(':')
+            if term_type not in SEARCH_TYPES or not term_target.strip():
+                raise ValueError(f"proximity term must be 'type:target', got {term!r}")
+            if term_type == 'dep':
+                parse_dep_query(term_target)
+        if query.get('order', 'any') not in ORDERS:
+            raise ValueError(f"order must be one of: {', '.join(ORDERS)}")
+    elif query.get('search_type') not in SEARCH_TYPES:
+        raise ValueError(f"search_type must be one of: {', '.join(SEARCH_TYPES)}")
+    elif query['search_type'] == 'dep':
+        parse_dep_query(query['target'])
+    return query
+
+
+def search_params(query):
+    """
+    A parsed query in kwic_search's parameter form.
+
+    A "near" query's 'type:target' terms become search_type / target and
+    near_type / near_target; max_dist, order and same_sentence become
+    near_dist / near_order / near_sentence. Other keys pass through.
+    """
+    params = dict(query)
+    if query.get('search_type') == 'near':
+        params['search_type'], _, params['target'] = query.get('target', '').partition(':')
+        params['near_type'], _, params['near_target'] = query.get('near', '').partition(':')
+        params['near_dist']     = query.get('max_dist', 5)
+        params['near_order']    = query.get('order', 'any')
+        params['near_sentence'] = query.get('same_sentence', True)
+    return params
+
+
+def concordance(index, query, model):
+    """KWIC rows and {"total", "exact", "sampled"} for a parsed query (see kwic_search.concordance)."""
+    return kwic_search.concordance(index, search_params(query), lambda text: tokenize(text, model))
+
+
+def highlight(row, color, attrs):
+    """The row's keyword colored with termcolor (both ends for dependency hits)."""
+    if row['ends']:
+        first, inner, last = row['ends']
+        return ' '.join(filter(None, [colored(first, color, attrs=attrs), inner,
+                                      colored(last, color, attrs=attrs)]))
+    return colored(row['mid'], color, attrs=attrs)
+
+
+def run_query(index, query, model, use_color, out):
+    """Run a single query against `index` and write its KWIC lines to `out`."""
+    color = query['color'] if query['color'] in COLORS else 'cyan'
+    attrs = [a for a in query['attrs'] if a in VALID_ATTRS] or ['bold']
+
+    rows, hits = concordance(index, query, model)
+
+    sort_mode = query['sort_mode'] if query['sort_mode'] in SORT_MODES else 'sequential'
+    target = query['target'] + (f" near {query['near']}" if query['search_type'] == 'near' else '')
+    count  = f"{'' if hits['exact'] else '~'}{hits['total']}"
+    if hits['sampled']:
+        count = f"{count}, sample={len(rows)}, seed={query.get('seed', 0)}"
+    out.write(f"\n=== KWIC (mode={query['search_type']}, target={target}, "
+              f"window={int(query['window'])}, sort={sort_mode}, hits={count}) ===\n\n")
+    for row in rows:
+        mid = highlight(row, color, attrs) if use_color else row['mid']
+        out.write(row['left'] + ' ' + mid + ' ' + row['right'] + '\n')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Batch KWIC search: parse once, run many queries.")
+    parser.add_argument('corpus', nargs='*', help="corpus .txt files (one document each)")
+    parser.add_argument('-q', '--queries', help="query file (default: read queries from stdin)")
+    parser.add_argument('--load-index', metavar='PATH', help="load a saved index instead of parsing")
+    parser.add_argument('--save-index', metavar='PATH', help="save the parsed index for later runs")
+    parser.add_argument('--model', default='en_core_web_sm', help="spaCy model (default: en_core_web_sm)")
+    parser.add_argument('-w', '--window', type=int, default=5, help="context window size (default: 5)")
+    parser.add_argument('--sort', dest='sort_mode', default='sequential', choices=sorted(SORT_MODES))
+    parser.add_argument('--sample', type=int, default=0,
+                        help="print a random sample of N lines per query (default: all hits)")
+    parser.add_argument('--seed', type=int, default=0, help="random seed for --sample (default: 0)")
+    parser.add_argument('--color', choices=['auto', 'always', 'never'], default='auto',
+                        help="highlight keywords with termcolor (default: auto, i.e. only on a terminal)")
+    parser.add_argument('--highlight', default='cyan', choices=sorted(COLORS), help="highlight color")
+    parser.add_argument('--attrs', default='bold', help="comma-separated highlight attributes")
+    args = parser.parse_args(argv)
+
+    if bool(args.corpus) == bool(args.load_index):
+        parser.error("give either corpus files or --load-index")
+
+    index = CorpusIndex.load(args.load_index) if args.load_index else build_index(args.corpus, args.model)
+    if args.save_index:
+        index.save(args.save_index)
+
+    use_color = args.color == 'always' or (args.color == 'auto' and sys.stdout.isatty())
+    if args.color == 'always':
+        os.environ.setdefault('FORCE_COLOR', '1')   # termcolor otherwise drops colors when piped
+
+    defaults = {
+        'search_type': 'token',     # as for a bare line, so JSON lines may omit it
+        'window':      args.window,
+        'sort_mode':   args.sort_mode,
+        'color':       args.highlight,
+        'attrs':       [a.strip() for a in args.attrs.split(',')],
+        'sample':      args.sample,
+        'seed':        args.seed,
+    }
+
+    stream = open(args.queries, encoding='utf-8') if args.queries else sys.stdin
+    try:
+        for lineno, line in enumerate(stream, 1):
+            try:
+                query = parse_query(line, defaults)
+            except ValueError as e:
+                print(f"line {lineno}: {e}", file=sys.stderr)
+                continue
+            if query is not None:
+                run_query(index, query, args.model, use_color, sys.stdout)
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+"""
+Client for kwic_daemon.py.
+
+Usage:
+  from kwic_client import KwicClient
+
+  with KwicClient() as client:
+      result = client.kwic(text=text, search_type="lemma", target="make", window=5)
+      for row in result["rows"]:
+          print(row["left"], row["mid"], row["right"])
+
+  python kwic_client.py ping | corpora | shutdown
+
+Algorithm overview:
+  - Connects to the daemon's Unix socket (KWIC_SOCKET, or a per-user path in
+    the temp directory). If nobody is listening, the daemon is started in the
+    background and the client waits for its socket to appear.
+  - Every call sends one JSON line and reads one JSON line back; a response
+    with "ok": false is raised as KwicError.
+"""
+
+import getpass
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+DEFAULT_SOCKET = os.environ.get("KWIC_SOCKET") or os.path.join(tempfile.gettempdir(),
+                                                               f"kwic-{getpass.getuser()}.sock")
+DAEMON_SCRIPT  = os.path.join(os.path.dirname(os.path.abspath(__file__)), "kwic_daemon.py")
+START_TIMEOUT  = 120.0   # seconds to wait for a freshly started daemon (model load)
+DAEMON_RUNNING = 3       # daemon exit status: another daemon already holds the socket path
+
+
+class KwicError(RuntimeError):
+    """The daemon answered a request with an error; `kind` is the daemon-side exception name."""
+
+    def __init__(self, message, kind=None):
+        super().__init__(message)
+        self.kind = kind
+
+
+class KwicClient:
+    """One connection to the daemon; not shared between threads."""
+
+    def __init__(self, path=DEFAULT_SOCKET, autostart=True, model="en_core_web_sm"):
+        self.path  = path
+        self._sock = self._connect(autostart, model)
+        self._file = self._sock.makefile("rb")
+
+    def _connect(self, autostart, model):
+        try:
+            return self._open()
+        except (FileNotFoundError, ConnectionRefusedError):
+            if not autostart:
+                raise
+        log = open(os.path.join(tempfile.gettempdir(), f"kwic-daemon-{getpass.getuser()}.log"), "ab")
+        with log:
+            proc = subprocess.Popen([sys.executable, DAEMON_SCRIPT, "--socket", self.path, "--model", model],
+                                    stdin=subprocess.DEVNULL, stdout=log, stderr=log, start_new_session=True)
+        deadline = time.monotonic() + START_TIMEOUT
+        while True:
+            try:
+                return self._open()
+            except (FileNotFoundError, ConnectionRefusedError):
+                # DAEMON_RUNNING: another client's daemon won the race and may still be loading the model
+                status = proc.poll()
+                if (status is not None and status != DAEMON_RUNNING) or time.monotonic() > deadline:
+                    raise KwicError(f"kwic daemon did not start on {self.path}; see {log.name}")
+                time.sleep(0.1)
+
+    def _open(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.connect(self.path)
+        except OSError:
+            sock.close()
+            raise
+        return sock
+
+    def close(self):
+        self._file.close()
+        self._sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ----------------------------------------------------------------------- #
+    # Requests                                                                #
+    # ----------------------------------------------------------------------- #
+    def request(self, op, **params):
+        """Send one request and return the decoded response dict."""
+        params["op"] = op
+        if "paths" in params:       # the daemon resolves paths against its own working directory
+            params["paths"] = [os.path.abspath(p) for p in params["paths"]]
+        self._sock.sendall(json.dumps(params, ensure_ascii=False).encode("utf-8") + b"\n")
+        line = self._file.readline()
+        if not line:
+            raise KwicError("kwic daemon closed the connection")
+        resp = json.loads(line)
+        if not resp.get("ok"):
+            raise KwicError(resp.get("error", f"{op} failed"), resp.get("type"))
+        return resp
+
+    def load(self, text=None, paths=None):
+        """Parse a corpus (once) and return its corpus_id."""
+        params = {"text": text} if text is not None else {"paths": list(paths)}
+        return self.request("load", **params)["corpus_id"]
+
+    def kwic(self, **query):
+        """Concordance rows: {"rows": [{"left", "mid", "right", ...}], "total", "exact"}."""
+        return self.request("kwic", **query)
+
+    def freq(self, **query):
+        return self.request("freq", **query)
+
+    def collocates(self, **query):
+        return self.request("collocates", **query)
+
+    def tokenize(self, text):
+        """[(text, lemma), ...] for each token of `text`."""
+        return [tuple(t) for t in self.request("tokenize", text=text)["tokens"]]
+
+
+if __name__ == "__main__":
+    op = sys.argv[1] if len(sys.argv) > 1 else "ping"
+    with KwicClient(autostart=op != "shutdown") as client:
+        print(json.dumps(client.request(op), indent=2))
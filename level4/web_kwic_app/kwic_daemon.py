@@ -0,0 +1,294 @@
+# -*- coding: utf-8 -*-
+"""
+Local KWIC query daemon: one process owns the spaCy model and the parsed corpora.
+
+Usage:
+  python kwic_daemon.py                          # socket: kwic_client.DEFAULT_SOCKET
+  python kwic_daemon.py --socket /tmp/kwic.sock --model en_core_web_sm
+
+Clients (kwic_client.py, the level1–level3 kwic() functions, and app.py when
+KWIC_SOCKET is set) start it on demand, so it rarely needs to be run by hand.
+
+Protocol: JSON lines over a Unix domain socket. Each request is one JSON
+object on one line and gets one JSON response line; responses on a
+connection come back in request order. An "id" field is echoed back.
+
+  {"op": "ping"}
+  {"op": "load", "text": "..."}  or  {"op": "load", "paths": ["a.txt", "b.txt"]}
+      -> {"ok": true, "corpus_id": "...", "tokens": N, "docs": D}
+  {"op": "kwic", "corpus_id": "...", "search_type": "lemma", "target": "make", ...}
+      -> {"ok": true, "corpus_id": "...", "rows": [...], "total": N, "exact": true, "sampled": false}
+      Query keys are those of kwic_cli.py (window, sort_mode, sample, seed,
+      near / max_dist / order / same_sentence, joiner, context, exclude);
+      hits are found and sorted as for "search" (kwic_search.concordance).
+  {"op": "freq", "corpus_id": "...", "layer": "lemma", "n": 2, "top": 20}
+  {"op": "collocates", "corpus_id": "...", "search_type": "lemma", "target": "make",
+   "layer": "lemma", "left": 5, "right": 5, "measure": "logdice", "min_freq": 2, "top": 20}
+  {"op": "search", "corpus_id": "...", "search_type": "lemma", "target": "make",
+   "offset": 0, "limit": 200, ...}
+      -> {"ok": true, "total": N, "rows": [...], "patterns": [...], "dispersion": {...}, "hits": {...}}
+      The web app's query (form fields as in kwic_search.QUERY_FIELDS), one
+      page of rows; the search itself is cached per corpus and query.
+  {"op": "dispersion", "corpus_id": "...", "search_type": ..., "target": ..., "parts": 10}
+      -> {"ok": true, "stats": {...}}
+  {"op": "tokenize", "text": "..."}        -> {"ok": true, "tokens": [[text, lemma], ...]}
+  {"op": "corpora"} / {"op": "unload", "corpus_id": "..."} / {"op": "shutdown"}
+
+Corpus ops also accept "text" or "paths" (absolute, or relative to the
+daemon's working directory) instead of "corpus_id", loading the corpus
+first (once; it is keyed by content hash). Errors come back as
+{"ok": false, "error": "...", "type": "<exception name>"}, with type
+"UnknownCorpusError" for a corpus_id that is not (or no longer) loaded; a
+request line longer than MAX_LINE gets an error reply and the connection
+is closed.
+
+Algorithm overview:
+  - One daemon per socket path: it holds an exclusive lock on "<socket>.lock"
+    from start-up to exit, so of two daemons started at once (two clients
+    autostarting) the second exits with DAEMON_RUNNING before loading the
+    model, and a socket file found under the lock is a stale one.
+  - The model is loaded once at start-up; every corpus is parsed once into a
+    CorpusIndex and kept in memory for all clients (the --max-corpora most
+    recently used ones).
+  - Requests run in worker threads (asyncio.to_thread); the daemon's own
+    pipeline only splits query targets (under kwic_cli's pipeline lock).
+    Corpora are parsed by --parse-workers processes (kwic_cli.parse_pool),
+    so a long parse stalls neither other clients nor their query targets;
+    concurrent loads of one corpus share a single parse.
+"""
+
+import argparse
+import asyncio
+from collections import OrderedDict
+import fcntl
+import json
+import os
+import signal
+import sys
+
+from corpus_index import corpus_key
+import kwic_cli
+import kwic_search
+from kwic_client import DAEMON_RUNNING, DEFAULT_SOCKET
+
+MAX_LINE    = 1 << 28   # longest request line (a whole corpus can be sent inline)
+MAX_CORPORA = 16        # parsed corpora kept in memory, least recently used dropped first
+CORPUS_OPS  = ("load", "kwic", "search", "dispersion", "freq", "collocates")
+
+
+class UnknownCorpusError(LookupError):
+    """A request names a corpus_id that is not loaded (never, or dropped from the cache)."""
+
+
+class KwicDaemon:
+    """Request dispatcher holding the parsed corpora."""
+
+    def __init__(self, model, max_corpora=MAX_CORPORA, parse_workers=kwic_cli.PARSE_WORKERS):
+        self.model       = model
+        self.max_corpora = max_corpora
+        self.parser      = kwic_cli.parse_pool(model, parse_workers)
+        self.corpora     = OrderedDict()   # corpus_id -> CorpusIndex, least recently used first
+        self._loading    = {}              # corpus_id -> asyncio.Future of its parse
+        self.stopped     = asyncio.Event()
+
+    # ----------------------------------------------------------------------- #
+    # Corpora                                                                 #
+    # ----------------------------------------------------------------------- #
+    async def corpus(self, req):
+        """Return (corpus_id, index) for a request's corpus_id, text or paths."""
+        if "text" in req or "paths" in req:
+            if "text" in req:
+                texts = [req["text"]]
+            else:
+                texts = await asyncio.to_thread(lambda: [kwic_cli.read_corpus(p) for p in req["paths"]])
+            corpus_id = corpus_key("\0".join(texts))
+            if corpus_id not in self.corpora:
+                task = self._loading.get(corpus_id)
+                if task is None:
+                    task = asyncio.wrap_future(self.parser.submit(kwic_cli.parse_texts, texts, self.model))
+                    self._loading[corpus_id] = task
+                    task.add_done_callback(lambda t, cid=corpus_id: self._loaded(cid, t))
+                return corpus_id, await asyncio.shield(task)
+        else:
+            corpus_id = req.get("corpus_id")
+            if corpus_id not in self.corpora:
+                raise UnknownCorpusError(f"unknown corpus_id {corpus_id!r}; send 'text' or 'paths' to load it")
+        self.corpora.move_to_end(corpus_id)
+        return corpus_id, self.corpora[corpus_id]
+
+    def _loaded(self, corpus_id, task):
+        del self._loading[corpus_id]
+        if not task.cancelled() and task.exception() is None:
+            self.corpora[corpus_id] = task.result()
+            while len(self.corpora) > self.max_corpora:
+                self.corpora.popitem(last=False)
+
+    # ----------------------------------------------------------------------- #
+    # Operations                                                              #
+    # ----------------------------------------------------------------------- #
+    async def dispatch(self, req):
+        op = req.get("op")
+        if op == "ping":
+            return {"ok": True}
+        if op == "corpora":
+            return {"ok": True, "corpora": {cid: {"tokens": len(ix), "docs": len(ix.doc_starts)}
+                                            for cid, ix in self.corpora.items()}}
+        if op == "unload":
+            return {"ok": self.corpora.pop(req.get("corpus_id"), None) is not None}
+        if op == "shutdown":
+            self.stopped.set()
+            return {"ok": True}
+        if op == "tokenize":
+            return {"ok": True, "tokens": await asyncio.to_thread(self.tokenize, req.get("text", ""))}
+        if op not in CORPUS_OPS:
+            raise ValueError(f"unknown op {op!r}")
+
+        corpus_id, index = await self.corpus(req)
+        if op == "load":
+            return {"ok": True, "corpus_id": corpus_id, "tokens": len(index), "docs": len(index.doc_starts)}
+        if op == "search":
+            return dict(await asyncio.to_thread(self.search, corpus_id, index, req), corpus_id=corpus_id)
+        if op == "dispersion":
+            return dict(await asyncio.to_thread(self.dispersion, index, req), corpus_id=corpus_id)
+        if op == "kwic":
+            return dict(await asyncio.to_thread(self.kwic, index, req), corpus_id=corpus_id)
+        if op == "freq":
+            return dict(await asyncio.to_thread(self.freq, index, req), corpus_id=corpus_id)
+        return dict(await asyncio.to_thread(self.collocates, index, req), corpus_id=corpus_id)
+
+    def tokenize(self, text):
+        return kwic_cli.tokenize(text, self.model)
+
+    def search(self, corpus_id, index, req):
+        offset = max(0, int(req.get("offset", 0)))
+        limit  = max(0, int(req.get("limit", 200)))
+        matches, patterns, dispersion, hits = kwic_search.kwic_result(corpus_id, index, req, self.tokenize)
+        rows = kwic_search.kwic_rows(index, matches[offset:offset + limit], req)
+        return {"ok": True, "total": len(matches), "rows": rows, "patterns": patterns,
+                "dispersion": dispersion, "hits": hits}
+
+    def dispersion(self, index, req):
+        matches = kwic_search.search(index, req, self.tokenize)
+        parts   = req.get("parts")
+        return {"ok": True, "stats": index.dispersion([i for i, _ in matches],
+                                                      n_parts=int(parts) if parts else None)}
+
+    def kwic(self, index, req):
+        rows, hits = kwic_search.concordance(index, kwic_cli.search_params(req), self.tokenize)
+        return dict(hits, ok=True, rows=rows)
+
+    def freq(self, index, req):
+        layer, n = req.get("layer", "word"), int(req.get("n", 1))
+        fl = index.freq_list(layer, n)
+        return {"ok": True, "total": fl.total, "types": len(fl),
+                "items": index.top_ngrams(layer, n, max(0, int(req.get("top", 20))))}
+
+    def collocates(self, index, req):
+        spans, _, _ = kwic_search.find_hits(index, kwic_cli.search_params(req), self.tokenize, dispersion=False)
+        items = index.collocates(spans,
+                                 layer=req.get("layer", "lemma"),
+                                 left=int(req.get("left", 5)),
+                                 right=int(req.get("right", 5)),
+                                 measure=req.get("measure", "logdice"),
+                                 min_freq=int(req.get("min_freq", 2)),
+                                 top=int(req.get("top", 20)))
+        return {"ok": True, "node_freq": len(spans), "items": items}
+
+    # ----------------------------------------------------------------------- #
+    # Connections                                                             #
+    # ----------------------------------------------------------------------- #
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:          # longer than MAX_LINE: the rest of it cannot be resynced
+                    await self.reply(writer, {"ok": False, "type": "ValueError",
+                                              "error": f"request line longer than {MAX_LINE} bytes"})
+                    break
+                if not line:
+                    break
+                req = {}
+                try:
+                    req  = json.loads(line)
+                    resp = await self.dispatch(req)
+                except Exception as e:      # report every failure to the client, keep serving
+                    resp = {"ok": False, "type": type(e).__name__, "error": f"{type(e).__name__}: {e}"}
+                if isinstance(req, dict) and "id" in req:
+                    resp["id"] = req["id"]
+                await self.reply(writer, resp)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except asyncio.CancelledError:      # shutdown with the connection still open
+            pass
+        finally:
+            writer.close()
+
+    async def reply(self, writer, resp):
+        writer.write(json.dumps(resp, ensure_ascii=False).encode("utf-8") + b"\n")
+        await writer.drain()
+
+
+def load_model(model):
+    """Load the spaCy model, downloading it first if it is not installed."""
+    try:
+        return kwic_cli.get_nlp(model)
+    except OSError:
+        from spacy.cli import download as spacy_download
+        print(f"Model '{model}' not found. Downloading...")
+        spacy_download(model)
+        return kwic_cli.get_nlp(model)
+
+
+def lock_socket_path(path):
+    """Take the exclusive lock on `path`.lock, held until the process exits; False if another daemon has it."""
+    fd = os.open(path + ".lock", os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        os.close(fd)
+        return False
+    return True
+
+
+async def serve(path, model, max_corpora=MAX_CORPORA, parse_workers=kwic_cli.PARSE_WORKERS):
+    # Before the (slow) model load: two clients may have started a daemon at once
+    if not lock_socket_path(path):
+        print(f"a daemon is already serving {path}", file=sys.stderr)
+        raise SystemExit(DAEMON_RUNNING)
+    await asyncio.to_thread(load_model, model)
+
+    if os.path.exists(path):
+        os.unlink(path)                     # stale socket from a crashed daemon
+    daemon = KwicDaemon(model, max_corpora, parse_workers)
+    server = await asyncio.start_unix_server(daemon.handle, path=path, limit=MAX_LINE)
+    os.chmod(path, 0o600)
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, daemon.stopped.set)
+
+    print(f"kwic daemon listening on {path} (model: {model})", flush=True)
+    try:
+        async with server:
+            await daemon.stopped.wait()
+    finally:
+        daemon.parser.shutdown(cancel_futures=True)
+        if os.path.exists(path):
+            os.unlink(path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Shared KWIC query daemon (Unix socket, JSON lines).")
+    parser.add_argument("--socket", default=DEFAULT_SOCKET, help=f"socket path (default: {DEFAULT_SOCKET})")
+    parser.add_argument("--model", default="en_core_web_sm", help="spaCy model (default: en_core_web_sm)")
+    parser.add_argument("--max-corpora", type=int, default=MAX_CORPORA,
+                        help=f"parsed corpora kept in memory (default: {MAX_CORPORA})")
+    parser.add_argument("--parse-workers", type=int, default=kwic_cli.PARSE_WORKERS,
+                        help=f"processes parsing corpora (default: {kwic_cli.PARSE_WORKERS})")
+    args = parser.parse_args(argv)
+    asyncio.run(serve(args.socket, args.model, args.max_corpora, args.parse_workers))
+
+
+if __name__ == "__main__":
+    main()
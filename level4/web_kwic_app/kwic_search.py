@@ -0,0 +1,325 @@
+# -*- coding: utf-8 -*-
+"""
+Query logic of the KWIC tools, shared by app.py, kwic_cli.py and kwic_daemon.py.
+
+Algorithm overview:
+  - Every function works on a CorpusIndex; spaCy is only needed to split
+    token / lemma targets, which callers supply as `tokenize(text)` ->
+    [(text, lemma), ...] (app.py: its own pipeline; the daemon: the shared one).
+  - find_hits() resolves a query (optionally with a proximity term or as a
+    seeded sample) to its matches, and sort_matches() orders them; every
+    client goes through these two, so a query finds the same hits in the
+    same order wherever it is run.
+  - build_kwic() adds next-token patterns and dispersion for the web app and
+    kwic_result() memoizes that per (corpus, query); kwic_rows() builds the
+    context strings for one slice of the matches only, so result pages never
+    pay for hits that are not displayed.
+  - concordance() builds every row of a query for the batch clients (the CLI
+    and the level scripts via the daemon), with their joiner / context /
+    exclude options.
+  - Without Flask, so the daemon answers the app's queries exactly as the
+    app would itself.
+"""
+
+from collections import Counter, OrderedDict
+import threading
+
+from markupsafe import Markup
+
+from corpus_index import ORDERS, pair_spans
+
+RESULT_CACHE_SIZE = 16
+_result_cache = OrderedDict()   # (corpus_id, query) -> (matches, patterns, dispersion, hits)
+_result_lock  = threading.Lock()
+
+QUERY_FIELDS   = ("search_type", "target", "window", "sort_mode",
+                  "near_type", "near_target", "near_dist", "near_order", "near_sentence",
+                  "sample", "seed")
+
+IGNORED_TOKENS = {"(", ")", ",", ".", ":", ";"}
+
+
+def int_param(params, key, default, minimum=0):
+    """Integer form parameter (>= `minimum` unless None); missing, empty or malformed values give `default`."""
+    value = params.get(key)
+    if value is None or value == "":
+        return default
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        return default
+    return value if minimum is None else max(minimum, value)
+
+
+def query_terms(s_type, target, tokenize):
+    """Index terms for a query (token / lemma targets via `tokenize`, POS tag sequences); None for unknown types."""
+    if s_type in ("token", "lemma"):
+        tokens = tokenize(target)
+        return [t for t, _ in tokens] if s_type == "token" else [lemma for _, lemma in tokens]
+    if s_type == "pos":
+        return target.split()
+    if s_type in ("entity", "dep"):
+        return [target]
+    return None
+
+
+def find_matches(index, s_type, target, tokenize):
+    """
+    Return a list of (match_start_index, match_span_length) from the index.
+
+      * Token: exact token match (case-insensitive)
+      * Lemma: exact lemma match (case-insensitive)
+      * POS: matches a POS tag sequence
+      * Entity: matches NER label
+      * Dep: "REL HEAD [DEP_POS]" dependency query (see parse_dep_query);
+        each match covers the dependent and its head
+    Matches starting on an IGNORED_TOKENS token are dropped, except for
+    dependency and entity queries, which name their relation / label
+    explicitly (so entity hit counts are exactly the index's entity counts).
+    """
+    terms = query_terms(s_type, target, tokenize)
+    if terms is None:
+        return []
+    try:
+        matches = index.find(s_type, terms)
+    except ValueError:          # malformed dependency query
+        return []
+    if s_type in ("dep", "entity"):
+        return matches
+    return [(i, n) for i, n in matches if index.texts[i] not in IGNORED_TOKENS]
+
+
+def search(index, params, tokenize):
+    """
+    Run the query described by `params` (request.form or request.args).
+
+    With a proximity term (near_type / near_target), primary matches are paired
+    with matches of the second term within near_dist tokens (near_order:
+    any / before / after; near_sentence: restrict to the same sentence), and
+    each pair is returned as one span covering both.
+    """
+    s_type  = params.get("search_type", "token")
+    target  = params.get("target", "").strip()
+    matches = find_matches(index, s_type, target, tokenize)
+
+    near_type   = params.get("near_type", "")
+    near_target = params.get("near_target", "").strip()
+    if near_type and near_target:
+        others  = find_matches(index, near_type, near_target, tokenize)
+        order   = params.get("near_order", "any")
+        pairs   = index.near(matches, others,
+                             max_dist=int_param(params, "near_dist", 5),
+                             order=order if order in ORDERS else "any",
+                             same_sentence=bool(params.get("near_sentence")))
+        matches = pair_spans(pairs)
+    return matches
+
+
+def sample_search(index, params, k, tokenize, dispersion=True):
+    """
+    Seeded random sample of `k` hits for a non-proximity query (see CorpusIndex.sample).
+
+    Returns (matches, hits, dispersion); dispersion is computed from the
+    posting positions when the hit count is exact (and `dispersion` is
+    set), otherwise None.
+    """
+    s_type, target = params.get("search_type", "token"), params.get("target", "").strip()
+    terms = query_terms(s_type, target, tokenize)
+    if not terms:               # unknown type or empty target
+        return [], {"total": 0, "exact": True, "sampled": True}, None
+
+    # IGNORED_TOKENS are all punctuation: only filter when the query can start on one
+    # (as in find_matches), so ordinary queries keep their exact index counts
+    can_hit_ignored = s_type in ("token", "lemma", "pos") and (terms[0] == "PUNCT" or terms[0] in IGNORED_TOKENS)
+    accept = (lambda i: index.texts[i] not in IGNORED_TOKENS) if can_hit_ignored else None
+
+    try:
+        matches, total, exact = index.sample(s_type, terms, k, seed=int_param(params, "seed", 0, minimum=None),
+                                             accept=accept)
+    except ValueError:          # malformed dependency query
+        return [], {"total": 0, "exact": True, "sampled": True}, None
+    positions = index.hit_positions(s_type, terms) if exact and dispersion else None
+    stats     = index.dispersion(positions) if positions is not None else None
+    return matches, {"total": total, "exact": exact, "sampled": True}, stats
+
+
+def find_hits(index, params, tokenize, dispersion=True):
+    """
+    Resolve the query in `params` to (matches, hits, dispersion).
+
+    Matches are (start, length) in corpus order and hits is {"total",
+    "exact", "sampled"}. With a positive "sample" parameter (and no
+    proximity term) only a seeded random sample of that many hits is drawn,
+    so the cost follows the sample size rather than the hit count.
+    Dispersion statistics of the hits are None unless `dispersion` is set.
+    """
+    sample = int_param(params, "sample", 0)
+    if sample > 0 and not params.get("near_type"):
+        return sample_search(index, params, sample, tokenize, dispersion)
+    matches = search(index, params, tokenize)
+    stats   = index.dispersion([i for i, _ in matches]) if dispersion else None
+    return matches, {"total": len(matches), "exact": True, "sampled": False}, stats
+
+
+def context_bounds(index, params):
+    """(start, length) -> (lo, hi) context bounds: the match's sentences, or its document with context=document."""
+    if params.get("context") == "document":
+        return lambda start, length: index.doc_bounds(index.doc_of(start))
+    return index.span_bounds
+
+
+def sort_matches(index, matches, params, patterns=None):
+    """
+    Order matches by params["sort_mode"], counting next-token patterns into `patterns` if given.
+
+    `patterns` is a Counter of (text, POS, entity) of the next token, which
+    is the one after the match inside its context (see context_bounds). The
+    frequency sorts put the most frequent next token / next POS first and
+    break ties on the left and right context windows as token id arrays, so
+    no context string is built for the sort; "sequential" keeps the match
+    order.
+    """
+    s_mode  = params.get("sort_mode", "sequential")
+    by_freq = s_mode in ("token_freq", "pos_freq")
+    if not by_freq and patterns is None:
+        return matches
+
+    window  = int_param(params, "window", 5)
+    bounds  = context_bounds(index, params)
+    nxt_ids = index.ids["word" if s_mode == "token_freq" else "pos"]
+    words   = index.ids["word"]
+    keyed   = []
+    for idx, span_len in matches:
+        lo, hi = bounds(idx, span_len)
+        nxt = idx + span_len
+        if patterns is not None and nxt < hi:
+            patterns[(index.texts[nxt], index.value("pos", nxt), index.ent_label(nxt))] += 1
+        if by_freq:
+            keyed.append((nxt_ids[nxt] if nxt < hi else 0,        # 0: no next token
+                          words[max(lo, idx - window):idx],
+                          words[nxt:min(hi, nxt + window)],
+                          (idx, span_len)))
+    if not by_freq:
+        return matches
+
+    # Most frequent next token / next POS first (descending)
+    freq = Counter(k[0] for k in keyed if k[0])
+    keyed.sort(key=lambda k: (-freq.get(k[0], 0), k[1], k[2]))
+    return [k[3] for k in keyed]
+
+
+def mark_span(tokens):
+    """Keyword cell HTML with the first and last token highlighted (dependent and head)."""
+    marked = [Markup("<mark>%s</mark>") % t for t in (tokens[0], tokens[-1])]
+    return Markup(" ").join([marked[0], *tokens[1:-1], marked[1]])
+
+
+def _context(bounds, idx, span_len, window):
+    """Left / keyword / right (start, end) position ranges of a match within its context and the next position or None."""
+    lo, hi = bounds(idx, span_len)
+    end    = idx + span_len
+    return (max(lo, idx - window), idx), (idx, end), (end, min(hi, end + window)), (end if end < hi else None)
+
+
+def build_kwic(index, params, tokenize):
+    """
+    Run the query in `params` and order its matches.
+
+    Returns (matches, patterns, dispersion, hits): the (start, length)
+    matches in display order, the ten most frequent next-token patterns,
+    dispersion statistics of the hits, and {"total", "exact", "sampled"}.
+    Patterns and dispersion come from the positions alone; the KWIC rows are
+    built per displayed slice by kwic_rows().
+    """
+    matches, hits, dispersion = find_hits(index, params, tokenize)
+    patterns = Counter()
+    matches  = sort_matches(index, matches, params, patterns)
+    return matches, patterns.most_common(10), dispersion, hits
+
+
+def kwic_rows(index, matches, params):
+    """KWIC row dicts (left / mid / right / mid_html) for a slice of build_kwic()'s matches."""
+    window = int_param(params, "window", 5)
+    bounds = context_bounds(index, params)
+    texts  = index.texts
+    # Dependency matches span dependent .. head: mark both end tokens
+    mark_ends = params.get("search_type") == "dep" and not params.get("near_type")
+
+    rows = []
+    for idx, span_len in matches:
+        left, mid, right, _ = _context(bounds, idx, span_len, window)
+        rows.append({
+            "left":     " ".join(texts[slice(*left)]),
+            "mid":      " ".join(texts[slice(*mid)]),
+            "right":    " ".join(texts[slice(*right)]),
+            "mid_html": mark_span(texts[slice(*mid)]) if mark_ends else None
+        })
+    return rows
+
+
+def concordance(index, params, tokenize):
+    """
+    Every KWIC row of the query in `params`, for the batch clients (kwic_cli.py, the daemon's "kwic" op).
+
+    Returns (rows, hits). Each row is a dict with left / mid / right
+    strings, `ends` ([first, inner, last] keyword parts for dependency hits,
+    whose two end tokens are highlighted; None otherwise) and the next
+    token's text / POS / entity label. Hits are found and ordered as for
+    the web app; these options only change what a row shows or which rows
+    are kept:
+      * joiner  – "ws" keeps the original whitespace (default), "space"
+                  joins tokens with single spaces
+      * context – "sentence" (default) or "document" bounds the window
+                  and the next token
+      * exclude – keyword strings to drop (before sorting); hits["total"]
+                  counts the remaining rows unless the query is sampled
+    """
+    matches, hits, _ = find_hits(index, params, tokenize, dispersion=False)
+    texts, spaces = index.texts, index.spaces
+    by_space = params.get("joiner") == "space"
+
+    def join(lo, hi):
+        if by_space:
+            return " ".join(texts[lo:hi])
+        return "".join(texts[j] + (" " if spaces[j] else "") for j in range(lo, hi)).strip()
+
+    exclude = set(params.get("exclude") or ())
+    if exclude:
+        matches = [(i, n) for i, n in matches if join(i, i + n) not in exclude]
+        if not hits["sampled"]:
+            hits = dict(hits, total=len(matches))
+
+    window    = int_param(params, "window", 5)
+    bounds    = context_bounds(index, params)
+    mark_ends = params.get("search_type") == "dep" and not params.get("near_type")
+    rows = []
+    for idx, span_len in sort_matches(index, matches, params):
+        left, mid, right, nxt = _context(bounds, idx, span_len, window)
+        end = idx + span_len
+        rows.append({
+            "left":      join(*left),
+            "mid":       join(*mid),
+            "right":     join(*right),
+            "ends":      [join(idx, idx + 1), join(idx + 1, end - 1), join(end - 1, end)] if mark_ends else None,
+            "next_word": texts[nxt]               if nxt is not None else "",
+            "next_pos":  index.value("pos", nxt)  if nxt is not None else "",
+            "next_ent":  index.ent_label(nxt)     if nxt is not None else "",
+        })
+    return rows, hits
+
+
+def kwic_result(corpus_id, index, params, tokenize):
+    """build_kwic() memoized per (corpus, query), so result pages reuse one search."""
+    key = (corpus_id, tuple(params.get(f, "") for f in QUERY_FIELDS))
+    with _result_lock:
+        cached = _result_cache.get(key)
+        if cached is not None:
+            _result_cache.move_to_end(key)
+            return cached
+
+    cached = build_kwic(index, params, tokenize)
+    with _result_lock:
+        _result_cache[key] = cached
+        while len(_result_cache) > RESULT_CACHE_SIZE:
+            _result_cache.popitem(last=False)
+    return cached
@@ -0,0 +1,207 @@
+# -*- coding: utf-8 -*-
+"""
+Offline load test for the KWIC Web App.
+
+Usage:
+  python loadtest.py --corpus corpus.txt                      # in-process waitress server
+  python loadtest.py --corpus corpus.txt -c 32 -n 2000 --threads 16
+  python loadtest.py --corpus corpus.txt --mix mix.json
+  python loadtest.py --corpus corpus.txt --corpus2 other.txt
+  python loadtest.py --corpus corpus.txt --url http://127.0.0.1:5000   # e.g. gunicorn workers
+
+Algorithm overview:
+  - Starts the app locally with the production server (create_server() in
+    app.py) on a free port, unless --url points at a running instance.
+  - Warm-up: every entry of the query mix is requested once, sequentially; the
+    status and a digest of each response body become the reference answer.
+    Entries marked "warm": false are skipped here (their reference is taken
+    after the load), so e.g. a second corpus is parsed while the load runs and
+    searches on the first one must not stall behind it.
+  - Load: -n requests drawn from the mix (by weight, fixed seed) are fired
+    from -c concurrent client threads. Each response is checked against its
+    reference, so corrupted shared state (model, caches) shows up as a
+    mismatch rather than passing silently.
+  - Reports throughput and p50 / p95 / p99 latency, overall and per entry.
+    The exit status is non-zero if any request failed or mismatched.
+
+A mix file is a JSON list of entries:
+  {"name": "lemma be", "weight": 2, "method": "POST", "path": "/",
+   "data": {"search_type": "lemma", "target": "be"}}
+POST entries to "/" get the corpus text added as the "text" field, and
+"{corpus_id}" in a path is replaced by the corpus id. "corpus": 2 selects the
+second corpus (--corpus2, by default the first half of --corpus).
+"""
+
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import json
+import logging
+import math
+import random
+import sys
+import threading
+import time
+from urllib.error import HTTPError
+from urllib.parse import urlencode
+from urllib.request import urlopen
+
+from corpus_index import corpus_key
+
+DEFAULT_MIX = [
+    {"name": "token the",      "weight": 4, "method": "POST", "path": "/",
+     "data": {"search_type": "token", "target": "the", "window": "5", "sort_mode": "sequential"}},
+    {"name": "lemma be",       "weight": 2, "method": "POST", "path": "/",
+     "data": {"search_type": "lemma", "target": "be", "window": "5", "sort_mode": "token_freq"}},
+    {"name": "pos NOUN",       "weight": 2, "method": "POST", "path": "/",
+     "data": {"search_type": "pos", "target": "NOUN", "window": "5", "sort_mode": "pos_freq"}},
+    {"name": "entity ORG",     "weight": 1, "method": "POST", "path": "/",
+     "data": {"search_type": "entity", "target": "ORG", "window": "5", "sort_mode": "sequential"}},
+    {"name": "near NOUN~DATE", "weight": 1, "method": "POST", "path": "/",
+     "data": {"search_type": "pos", "target": "NOUN", "window": "5", "sort_mode": "sequential",
+              "near_type": "entity", "near_target": "DATE", "near_dist": "5", "near_sentence": "1"}},
+    {"name": "freq lemma 2",   "weight": 2, "method": "GET",
+     "path": "/freq/{corpus_id}?layer=lemma&n=2&top=50"},
+    {"name": "dispersion",     "weight": 1, "method": "GET",
+     "path": "/dispersion/{corpus_id}?search_type=lemma&target=be&parts=10"},
+    {"name": "2nd corpus",     "weight": 1, "method": "POST", "path": "/", "corpus": 2, "warm": False,
+     "data": {"search_type": "lemma", "target": "be", "window": "5", "sort_mode": "sequential"}},
+]
+
+
+def percentile(sorted_vals, p):
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_vals:
+        return float("nan")
+    k = max(0, min(len(sorted_vals) - 1, math.ceil(p / 100 * len(sorted_vals)) - 1))
+    return sorted_vals[k]
+
+
+def prepare(mix, texts, base_url):
+    """Turn mix entries into (name, url, body-bytes-or-None) requests; texts maps 1 / 2 to a corpus."""
+    prepared = []
+    for entry in mix:
+        text = texts[entry.get("corpus", 1)]
+        url  = base_url + entry["path"].replace("{corpus_id}", corpus_key(text))
+        body = None
+        if entry.get("method", "GET").upper() == "POST":
+            data = dict(entry.get("data", {}))
+            if entry["path"] == "/":
+                data.setdefault("text", text)
+            body = urlencode(data).encode("utf-8")
+        prepared.append((entry.get("name", entry["path"]), url, body))
+    return prepared
+
+
+def fetch(url, body, timeout):
+    """Issue one request; return (status, body_digest, seconds)."""
+    t0 = time.perf_counter()
+    try:
+        with urlopen(url, data=body, timeout=timeout) as resp:
+            status, payload = resp.status, resp.read()
+    except HTTPError as e:
+        status, payload = e.code, e.read()
+    except OSError as e:
+        status, payload = 0, repr(e).encode("utf-8")
+    return status, hashlib.sha1(payload).hexdigest(), time.perf_counter() - t0
+
+
+def start_local_server(threads):
+    """Run the app under its production server on a free local port (daemon thread)."""
+    import app as kwic_app
+    # Clients outnumbering server threads is the point of the test; skip the per-request warning
+    logging.getLogger("waitress.queue").setLevel(logging.ERROR)
+    server = kwic_app.create_server("127.0.0.1", 0, threads=threads)
+    threading.Thread(target=server.run, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.effective_port}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test the KWIC Web App.")
+    parser.add_argument("--corpus", required=True, help="corpus .txt file (UTF-8)")
+    parser.add_argument("--corpus2", help="second corpus for \"corpus\": 2 entries (default: first half of --corpus)")
+    parser.add_argument("--mix", help="JSON query mix (default: built-in mix)")
+    parser.add_argument("-c", "--concurrency", type=int, default=16, help="concurrent clients (default: 16)")
+    parser.add_argument("-n", "--requests", type=int, default=500, help="total requests (default: 500)")
+    parser.add_argument("--threads", type=int, default=8, help="server threads for the local server (default: 8)")
+    parser.add_argument("--url", help="test a running server instead of starting one")
+    parser.add_argument("--timeout", type=float, default=120.0, help="per-request timeout in seconds")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the request sequence")
+    args = parser.parse_args(argv)
+
+    with open(args.corpus, encoding="utf-8") as f:
+        text = f.read().strip()
+    if args.corpus2:
+        with open(args.corpus2, encoding="utf-8") as f:
+            text2 = f.read().strip()
+    else:
+        text2 = text[:len(text) // 2]
+    if args.mix:
+        with open(args.mix, encoding="utf-8") as f:
+            mix = json.load(f)
+    else:
+        mix = DEFAULT_MIX
+
+    server = None
+    if args.url:
+        base_url = args.url.rstrip("/")
+    else:
+        server, base_url = start_local_server(args.threads)
+
+    try:
+        requests = prepare(mix, {1: text, 2: text2}, base_url)
+
+        # --- 1. Warm-up: sequential reference answers (also parses the corpus) --- #
+        reference = [None] * len(requests)
+        for k, (name, url, body) in enumerate(requests):
+            if mix[k].get("warm", True):
+                status, digest, secs = fetch(url, body, args.timeout)
+                print(f"warm-up  {name:<20} status={status}  {secs * 1000:8.1f} ms")
+                reference[k] = (status, digest)
+
+        # --- 2. Concurrent load --- #
+        rng      = random.Random(args.seed)
+        schedule = rng.choices(range(len(requests)), weights=[e.get("weight", 1) for e in mix], k=args.requests)
+
+        def one(k):
+            _, url, body = requests[k]
+            return (k,) + fetch(url, body, args.timeout)
+
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            results = list(pool.map(one, schedule))
+        wall = time.perf_counter() - t0
+
+        # Cold entries: reference answers now that their corpora are built
+        for k, (name, url, body) in enumerate(requests):
+            if reference[k] is None:
+                status, digest, _ = fetch(url, body, args.timeout)
+                reference[k] = (status, digest)
+    finally:
+        if server is not None:
+            server.close()
+
+    # --- 3. Report --- #
+    errors     = sum(1 for k, status, _, _ in results if status != 200)
+    mismatches = sum(1 for k, status, digest, _ in results
+                     if status == 200 and (status, digest) != reference[k])
+    latencies  = sorted(secs for _, _, _, secs in results)
+
+    print(f"\n=== {len(results)} requests, concurrency={args.concurrency}, wall={wall:.2f}s ===\n")
+    print(f"throughput : {len(results) / wall:.1f} req/s")
+    print(f"latency ms : p50={percentile(latencies, 50) * 1000:.1f}  "
+          f"p95={percentile(latencies, 95) * 1000:.1f}  p99={percentile(latencies, 99) * 1000:.1f}")
+    print(f"errors     : {errors}")
+    print(f"mismatches : {mismatches}  (responses differing from the sequential reference)\n")
+
+    for k, (name, _, _) in enumerate(requests):
+        lat = sorted(secs for j, _, _, secs in results if j == k)
+        if lat:
+            print(f"  {name:<20} n={len(lat):<6} p50={percentile(lat, 50) * 1000:8.1f}  "
+                  f"p95={percentile(lat, 95) * 1000:8.1f}  p99={percentile(lat, 99) * 1000:8.1f} ms")
+
+    return 1 if errors or mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())